@@ -0,0 +1,811 @@
+"""
+Движок анализа проданных ключей без зависимости от GUI (используется и окном, и CLI)
+"""
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import FunPayAPI
+import requests
+from FunPayAPI.common import exceptions
+
+from async_fetcher import FUNPAY_URL, HAS_AIOHTTP, AsyncFetchError, AsyncOrderFetcher, AsyncUnauthorizedError
+from checkpoint import AnalysisCheckpoint
+from key_extractor import extract_keys_from_html, resolve_backend  # noqa: F401 - используется GUI
+from key_index import KeyIndex
+from lot_matcher import LotMatcher
+from order_cache import OrderCache, DEFAULT_MAX_SIZE_MB
+from order_record import STATUS_CLOSED, parse_order_page
+from parse_pool import ParsePool
+from rate_limiter import AdaptivePacer
+from result_store import ResultStore
+from retry_policy import RetryCancelled, RetryPolicy
+
+# Данные, которые должны переживать перезапуск (в onefile-сборке _MEIPASS временный)
+if getattr(sys, 'frozen', False):
+    DATA_DIR = os.path.dirname(sys.executable)
+else:
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(DATA_DIR, "orders_cache.sqlite3")
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "analysis_checkpoint.json")
+KEY_INDEX_FILE = os.path.join(DATA_DIR, "key_history.sqlite3")
+CHECKPOINT_INTERVAL = 10  # Секунд между сохранениями контрольной точки
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Итоговые статусы запуска
+STATUS_COMPLETED = "completed"        # Все страницы и заказы обработаны
+STATUS_INCOMPLETE = "incomplete"      # Часть страниц/заказов не загружена, прогресс сохранен
+STATUS_NOT_FOUND = "not_found"        # Нет заказов с указанным лотом
+STATUS_STOPPED = "stopped"            # Остановлен пользователем
+STATUS_UNAUTHORIZED = "unauthorized"  # Проблемы с авторизацией
+STATUS_ERROR = "error"                # Критическая ошибка
+
+# События движка (кладутся в очередь как (событие, аргументы))
+EVENT_LOG = "log"            # (message, created) - created: time.time() момента записи
+EVENT_PROGRESS = "progress"  # (processed, matched)
+EVENT_KEYS = "keys"          # (rows,) - rows: список пар (номер, {'key', 'order_id', 'date'})
+EVENT_RECORD = "record"      # (record,) - запись о заказе (order_record.parse_order_page)
+EVENT_PACING = "pacing"      # (rate, interval, min_rate, max_rate) - темп запросов, запр/сек и сек
+EVENT_FINISHED = "finished"  # (summary,) - итог run(), последнее событие запуска
+
+# Потолок темпа при повторе кассеты: запросы не уходят в сеть
+OFFLINE_RATE = 1000000.0
+
+# События, для которых важно только последнее значение
+_LATEST_ONLY_EVENTS = (EVENT_PROGRESS, EVENT_PACING)
+
+
+def create_account(golden_key, user_agent=None, base_url=None):
+    """Создание и авторизация FunPayAPI.Account; base_url - другой адрес FunPay (локальная замена для проверок)"""
+    # Очищаем User-Agent от недопустимых символов
+    user_agent_clean = (user_agent or "").encode('ascii', 'ignore').decode('ascii')
+    if not user_agent_clean:
+        user_agent_clean = DEFAULT_USER_AGENT
+    if base_url and base_url.rstrip("/") != FUNPAY_URL:
+        from funpay_standin import StandInAccount
+        account = StandInAccount(base_url, golden_key=golden_key, user_agent=user_agent_clean)
+    else:
+        account = FunPayAPI.Account(golden_key=golden_key, user_agent=user_agent_clean)
+    account.get()
+    return account
+
+
+def fetch_order_html(account, order_id):
+    """HTML страницы заказа через авторизацию FunPayAPI.Account, без разбора в get_order:
+    страница разбирается один раз, в order_record.parse_order_page"""
+    response = account.method("get", f"orders/{order_id}/", {"accept": "*/*"}, {}, raise_not_200=True)
+    html = response.content.decode()
+    # Как и FunPayAPI: без блока пользователя страница считается неавторизованной
+    if "user-link-name" not in html:
+        raise exceptions.UnauthorizedError(response)
+    return html
+
+
+def dispatch_events(events, handlers, max_events=None):
+    """Обработка накопившихся событий из очереди в текущем потоке (без ожидания).
+    handlers - словарь {событие: обработчик(*args)}; progress и pacing схлопываются до последнего.
+    Возвращает число извлеченных событий"""
+    count = 0
+    latest = {}
+    while max_events is None or count < max_events:
+        try:
+            event, args = events.get_nowait()
+        except queue.Empty:
+            break
+        count += 1
+        if event in _LATEST_ONLY_EVENTS:
+            latest[event] = args
+            continue
+        # Перед ключами и итогом показываем актуальный прогресс
+        for pending_event in list(latest):
+            _call_handler(handlers, pending_event, latest.pop(pending_event))
+        _call_handler(handlers, event, args)
+    for event, args in latest.items():
+        _call_handler(handlers, event, args)
+    return count
+
+
+def _call_handler(handlers, event, args):
+    handler = handlers.get(event)
+    if handler:
+        handler(*args)
+
+
+class AnalysisSettings:
+    """Параметры анализа (секции [Safety], [Cache], [Parsing] и [History] config.ini)"""
+    
+    def __init__(self, min_delay=2.0, max_delay=5.0, order_limit=None, page_limit=None, workers=4,
+                 max_retries=4, async_http=HAS_AIOHTTP, cache_enabled=True, cache_size_mb=DEFAULT_MAX_SIZE_MB,
+                 parser_backend="auto", process_pool=False, history_enabled=True):
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+        self.order_limit = int(order_limit) if order_limit else None  # 0 = без лимита
+        self.page_limit = int(page_limit) if page_limit else None
+        self.workers = max(1, int(workers or 1))
+        self.max_retries = max(1, int(max_retries or 1))
+        self.async_http = bool(async_http)
+        self.cache_enabled = bool(cache_enabled)
+        self.cache_size_mb = float(cache_size_mb or DEFAULT_MAX_SIZE_MB)
+        self.parser_backend = resolve_backend(parser_backend)  # Движок извлечения ключей (key_extractor)
+        self.process_pool = bool(process_pool)  # Разбор HTML в пуле процессов по числу ядер
+        self.history_enabled = bool(history_enabled)  # Поиск повторов ключей в прошлых запусках (key_index)
+    
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Настройки из configparser.ConfigParser (overrides со значением None игнорируются)"""
+        values = {
+            'min_delay': config.getfloat("Safety", "min_delay_sec", fallback=2),
+            'max_delay': config.getfloat("Safety", "max_delay_sec", fallback=5),
+            'order_limit': config.getint("Safety", "order_limit", fallback=0),
+            'page_limit': config.getint("Safety", "page_limit", fallback=0),
+            'workers': config.getint("Safety", "workers", fallback=4),
+            'max_retries': config.getint("Safety", "max_retries", fallback=4),
+            'async_http': config.getboolean("Safety", "async_http", fallback=HAS_AIOHTTP),
+            'cache_enabled': config.getboolean("Cache", "enabled", fallback=True),
+            'cache_size_mb': config.getfloat("Cache", "max_size_mb", fallback=DEFAULT_MAX_SIZE_MB),
+            'parser_backend': config.get("Parsing", "backend", fallback="auto"),
+            'process_pool': config.getboolean("Parsing", "process_pool", fallback=False),
+            'history_enabled': config.getboolean("History", "enabled", fallback=True),
+        }
+        values.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(**values)
+
+
+class AnalysisEngine:
+    """Загрузка продаж, фильтрация по лоту и извлечение ключей.
+    
+    О ходе работы сообщает событиями EVENT_* в потокобезопасную очередь events:
+    движок не вызывает код интерфейса из своих потоков, а GUI или CLI
+    разбирают очередь в своем потоке (см. dispatch_events)
+    """
+    
+    def __init__(self, account, settings, cache_file=CACHE_FILE, checkpoint_file=CHECKPOINT_FILE, events=None,
+                 cassette=None, key_index_file=KEY_INDEX_FILE):
+        self.account = account
+        self.settings = settings
+        self.cache_file = cache_file            # None - без кэша заказов
+        self.checkpoint_file = checkpoint_file  # None - без контрольных точек
+        self.cassette = cassette                # cassette.CassetteRecorder - запись ответов FunPay
+        self.key_index_file = key_index_file    # None - без истории ключей между запусками
+        self.events = events if events is not None else queue.Queue()
+        self.is_running = False
+        self.is_paused = False
+        self.all_sold_keys = ResultStore()  # Найденные ключи (key_data['key'], ['order_id'], ['date'], ...)
+        self.order_records = {}  # ID заказа -> запись о заказе (ключи и данные страницы)
+    
+    def emit(self, event, *args):
+        self.events.put((event, args))
+    
+    def log(self, message):
+        self.emit(EVENT_LOG, message, time.time())
+    
+    def emit_pacing(self, pacer):
+        self.emit(EVENT_PACING, pacer.rate, pacer.interval, pacer.min_rate, pacer.max_rate)
+    
+    def stop(self):
+        self.is_running = False
+        self.is_paused = False
+    
+    def pause(self):
+        self.is_paused = True
+    
+    def resume(self):
+        self.is_paused = False
+    
+    def run(self, game_id, lot_name, checkpoint=None):
+        """Основная логика анализа (lot_name - лот или список лотов, checkpoint - продолжение прерванного запуска).
+        Возвращает итоговую статистику со статусом запуска (она же приходит событием EVENT_FINISHED)"""
+        self.is_running = True
+        self.is_paused = False
+        # Список сохраняет идентичность: GUI держит на него ссылку
+        self.all_sold_keys.clear()
+        self.order_records.clear()
+        if checkpoint:
+            self.all_sold_keys.extend(checkpoint.keys)
+            self.order_records.update((record['order_id'], record) for record in checkpoint.records)
+            # Данные перенесены в хранилище - копии в контрольной точке не держим весь запуск
+            checkpoint.keys, checkpoint.records = [], []
+        summary = {'status': STATUS_ERROR}
+        try:
+            # Проверяем, что аккаунт инициализирован
+            if not self.account:
+                self.log("❌ Ошибка: Аккаунт не инициализирован. Сначала протестируйте подключение!")
+                summary['status'] = STATUS_UNAUTHORIZED
+                return summary
+            # Все лоты ищутся в одном проходе по истории продаж
+            matcher = LotMatcher(lot_name)
+            if not matcher.lots:
+                self.log("❌ Ошибка: не указано название лота")
+                return summary
+            
+            # Получение настроек
+            settings = self.settings
+            min_delay = settings.min_delay
+            max_delay = settings.max_delay
+            order_limit = settings.order_limit
+            page_limit = settings.page_limit
+            workers = settings.workers
+            use_async = settings.async_http
+            if use_async and not HAS_AIOHTTP:
+                self.log("⚠️ aiohttp не установлен - заказы загружаются в потоках (pip install aiohttp)")
+                use_async = False
+            max_retries = settings.max_retries
+            offline = getattr(self.account, 'offline', False)
+            if offline:
+                # Повтор записанной сессии: ответы уже на диске, ждать и повторять нечего
+                self.log("📼 Повтор записанной сессии без сети")
+                min_delay = max_delay = 0
+                use_async = False
+                max_retries = 1
+            if self.cassette:
+                self.cassette.attach(self.account, game_id, lot_name)
+                self.log(f"📼 Запись ответов в {self.cassette.path}")
+            # Асинхронный режим: один поток-потребитель с циклом событий
+            consumer_count = 1 if use_async else workers
+            order_cache = None
+            if settings.cache_enabled and self.cache_file and not offline:
+                order_cache = OrderCache(self.cache_file, settings.cache_size_mb)
+            parse_pool = ParsePool(settings.parser_backend) if settings.process_pool else None
+            key_index = None
+            if settings.history_enabled and self.key_index_file:
+                key_index = KeyIndex(self.key_index_file)
+            
+            # Общий адаптивный темп запросов на весь запуск (и страницы, и заказы):
+            # интервал между запросами держится в пределах [min_delay, max_delay]
+            pacer = AdaptivePacer(min_delay, max_delay, unpaced_rate=OFFLINE_RATE if offline else 1000.0)
+            abort = threading.Event()
+            is_cancelled = lambda: not self.is_running or abort.is_set()
+            
+            # Общая политика повторов для страниц и заказов: ответы с ошибкой и сбои соединения
+            # (requests в синхронном пути FunPayAPI пробрасывает как есть)
+            auth_errors = (exceptions.UnauthorizedError, AsyncUnauthorizedError)
+            transport_errors = (exceptions.RequestFailedError, AsyncFetchError,
+                                requests.exceptions.RequestException)
+            retry_policy = RetryPolicy(
+                max_attempts=max_retries,
+                base_delay=max(min_delay, 1.0),
+                retry_on=transport_errors,
+                no_retry_on=auth_errors
+            )
+            dead_letters = []  # Заказы, не загруженные после всех попыток
+            
+            self.log(f"🔍 Начинаю поиск заказов для игры ID: {game_id}")
+            if len(matcher) > 1:
+                self.log(f"📦 Лоты ({len(matcher)}): {', '.join(matcher.lots)} - один проход по истории продаж")
+            else:
+                self.log(f"📦 Лот: {', '.join(matcher.lots)}")
+            if page_limit:
+                self.log(f"📄 Лимит страниц: {page_limit} (≈ {page_limit * 100} заказов)")
+            if order_limit:
+                self.log(f"🔢 Лимит заказов для анализа: {order_limit}")
+            if use_async:
+                self.log(f"⚡ Асинхронная загрузка: до {workers} запросов одновременно, "
+                         f"начальный темп: {pacer.rate:.2f} запр/сек")
+            else:
+                self.log(f"🧵 Потоков загрузки: {workers}, начальный темп: {pacer.rate:.2f} запр/сек")
+            if parse_pool:
+                self.log(f"🧩 Разбор страниц заказов: {settings.parser_backend}, процессов: {parse_pool.processes}")
+            else:
+                self.log(f"🧩 Разбор страниц заказов: {settings.parser_backend}")
+            self.emit_pacing(pacer)
+            
+            # Состояние для контрольных точек
+            if checkpoint:
+                resumed_orders = checkpoint.pending_orders()
+                self.log(f"⏯️ Продолжаю с контрольной точки: страница {checkpoint.page_num}, "
+                         f"обработано заказов {len(checkpoint.processed_ids)}, "
+                                 f"в очереди {len(resumed_orders)}, ключей {len(self.all_sold_keys)}")
+            else:
+                checkpoint = AnalysisCheckpoint(game_id, lot_name)
+                resumed_orders = []
+                if self.checkpoint_file:
+                    # Журнал прошлого запуска не должен смешаться с новым
+                    AnalysisCheckpoint.remove(self.checkpoint_file)
+            pending = {order['id']: order for order in checkpoint.pending}
+            processed_ids = set(checkpoint.processed_ids)
+            
+            # Конвейер: пагинация кладет подходящие заказы в ограниченную очередь,
+            # пул потоков сразу же их анализирует
+            order_queue = queue.Queue(maxsize=workers * 4)
+            results_lock = threading.Lock()
+            stats = {'pages': 0, 'loaded': 0, 'matched': checkpoint.matched, 'processed': 0, 'cached': 0}
+            lot_stats = {lot: {'orders': 0, 'keys': 0} for lot in matcher.lots}  # Обработано по каждому лоту
+            unsaved_orders = []  # Строки журнала контрольной точки с прошлого сохранения
+            saved_state = [None]
+            
+            def save_checkpoint():
+                if not self.checkpoint_file:
+                    return
+                with results_lock:
+                    # В журнал дописываются только новые заказы; если ничего не изменилось - не пишем вовсе
+                    orders = list(unsaved_orders)
+                    unsaved_orders.clear()
+                    state = (checkpoint.start_from, checkpoint.page_num, checkpoint.paging_done,
+                             stats['matched'], len(pending))
+                    if not orders and state == saved_state[0]:
+                        return
+                    checkpoint.matched = stats['matched']
+                    checkpoint.pending = list(pending.values())
+                try:
+                    checkpoint.save(self.checkpoint_file, orders)
+                    saved_state[0] = state
+                except Exception as e:
+                    with results_lock:
+                        unsaved_orders[:0] = orders
+                    self.log(f"⚠️ Не удалось сохранить контрольную точку: {e}")
+            
+            def paced(request):
+                # Темп меняется ровно один раз на каждую попытку: успех ускоряет, ошибка замедляет
+                # (и для последней попытки тоже - хуки повторов и обработчики итоговой ошибки его не трогают)
+                if not pacer.acquire(is_cancelled):
+                    raise RetryCancelled()
+                try:
+                    result = request()
+                except auth_errors:
+                    raise
+                except transport_errors as e:
+                    pacer.on_failure(getattr(e, 'status_code', None))
+                    raise
+                pacer.on_success()
+                return result
+            
+            async def paced_async(request):
+                if not await pacer.acquire_async(is_cancelled):
+                    raise RetryCancelled()
+                try:
+                    result = await request()
+                except auth_errors:
+                    raise
+                except transport_errors as e:
+                    pacer.on_failure(getattr(e, 'status_code', None))
+                    raise
+                pacer.on_success()
+                return result
+            
+            def on_retry(what, e, attempt, delay):
+                self.emit_pacing(pacer)
+                self.log(f"⚠️ Ошибка запроса {what} (попытка {attempt}/{retry_policy.max_attempts}): "
+                         f"{self.describe_error(e)}. Повтор через {delay:.1f} сек")
+            
+            def wait_if_paused():
+                while self.is_paused and self.is_running:
+                    time.sleep(0.1)
+            
+            def enqueue(item):
+                while True:
+                    try:
+                        order_queue.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        if item is not None and is_cancelled():
+                            return False
+            
+            def produce_orders():
+                start_from = checkpoint.start_from
+                page_num = checkpoint.page_num
+                
+                try:
+                    # Сначала заказы, не обработанные в прошлый раз
+                    for order in resumed_orders:
+                        if not enqueue(order):
+                            return
+                    
+                    while not checkpoint.paging_done and not is_cancelled():
+                        wait_if_paused()
+                        
+                        if is_cancelled():
+                            break
+                        self.log(f"📄 Загружаю страницу {page_num}...")
+                        
+                        def fetch_page():
+                            return paced(lambda: self.account.get_sells(
+                                start_from=start_from,
+                                game=game_id,
+                                state="closed",
+                                include_paid=False,
+                                include_refunded=False
+                            ))
+                        
+                        try:
+                            next_start_from, orders_batch = retry_policy.call(
+                                fetch_page, is_cancelled,
+                                lambda e, attempt, delay: on_retry(f"страницы {page_num}", e, attempt, delay)
+                            )
+                            
+                            if not orders_batch:
+                                self.log("ℹ️ Больше заказов не найдено")
+                                checkpoint.paging_done = True
+                                break
+                            
+                            stats['pages'] = page_num
+                            stats['loaded'] += len(orders_batch)
+                            self.log(f"✅ Загружено {len(orders_batch)} заказов (всего: {stats['loaded']})")
+                            
+                            # Фильтрация по названию лота сразу для каждой страницы
+                            remaining = order_limit - stats['matched'] if order_limit else None
+                            matched_orders = self.filter_orders_batch(orders_batch, matcher, remaining)
+                            
+                            # Страница учтена в контрольной точке вместе с ее заказами
+                            with results_lock:
+                                stats['matched'] += len(matched_orders)
+                                for order in matched_orders:
+                                    pending[order.id] = AnalysisCheckpoint.order_to_dict(order)
+                                checkpoint.start_from = next_start_from
+                                checkpoint.page_num = page_num + 1
+                            
+                            for order in matched_orders:
+                                if not enqueue(order):
+                                    return
+                            
+                            # Лимит заказов набран - остальные страницы не нужны
+                            if order_limit and stats['matched'] >= order_limit:
+                                self.log(f"⚠️ Достигнут лимит заказов: {order_limit}, загрузка страниц остановлена")
+                                checkpoint.paging_done = True
+                                break
+                            
+                            if not next_start_from:
+                                self.log("ℹ️ Достигнут конец списка заказов")
+                                checkpoint.paging_done = True
+                                break
+                            
+                            # Проверяем лимит страниц
+                            if page_limit and page_num >= page_limit:
+                                self.log(f"⚠️ Достигнут лимит страниц: {page_limit}")
+                                checkpoint.paging_done = True
+                                break
+                            
+                            start_from = next_start_from
+                            page_num += 1
+                            
+                        except RetryCancelled:
+                            break
+                            
+                        except exceptions.UnauthorizedError:
+                            self.log("❌ Ошибка авторизации. Проверьте Golden Key")
+                            abort.set()
+                            break
+                            
+                        except transport_errors as e:
+                            # Курсор остается в контрольной точке - страницу можно догрузить продолжением
+                            self.log(f"❌ Страница {page_num} не загружена после {retry_policy.max_attempts} "
+                                     f"попыток: {self.describe_error(e)}")
+                            self.emit_pacing(pacer)
+                            break
+                            
+                        except Exception as e:
+                            self.log(f"❌ Неожиданная ошибка на странице {page_num}: {e}")
+                            break
+                finally:
+                    # По одному маркеру конца очереди на каждого потребителя
+                    for _ in range(consumer_count):
+                        enqueue(None)
+            
+            def cached_html(order_header):
+                # Закрытый заказ из кэша - без запроса и без задержки
+                if not order_cache:
+                    return None
+                html = order_cache.get(order_header.id)
+                if html is not None:
+                    with results_lock:
+                        stats['cached'] += 1
+                    if self.cassette:
+                        self.cassette.record_order(order_header.id, html)
+                return html
+            
+            def parse_record(order_header, html):
+                date = AnalysisCheckpoint.order_date(order_header)
+                if parse_pool:
+                    return parse_pool.parse(html, order_header.id, date)
+                return parse_order_page(html, order_header.id, date, settings.parser_backend)
+            
+            async def parse_record_async(order_header, html):
+                # Разбор не должен задерживать цикл событий с загрузками
+                if parse_pool:
+                    date = AnalysisCheckpoint.order_date(order_header)
+                    return await parse_pool.parse_async(html, order_header.id, date)
+                return await asyncio.get_running_loop().run_in_executor(None, parse_record, order_header, html)
+            
+            def order_fetch_failed(order_header, e):
+                if isinstance(e, auth_errors):
+                    abort.set()
+                    self.log("❌ Ошибка авторизации. Проверьте Golden Key")
+                    return
+                self.log(f"❌ Заказ {order_header.id} не загружен после {retry_policy.max_attempts} "
+                         f"попыток: {self.describe_error(e)}. Повторю в конце анализа")
+                with results_lock:
+                    dead_letters.append(order_header)
+            
+            def store_order_html(order_header, html, record):
+                if self.cassette:
+                    self.cassette.record_order(order_header.id, html)
+                if order_cache and record['status'] == STATUS_CLOSED:
+                    order_cache.put(order_header.id, html)
+            
+            def process_order(order_header):
+                wait_if_paused()
+                
+                if is_cancelled():
+                    return None
+                
+                html = cached_html(order_header)
+                if html is not None:
+                    return parse_record(order_header, html)
+                
+                def fetch_order():
+                    return paced(lambda: fetch_order_html(self.account, order_header.id))
+                
+                try:
+                    html = retry_policy.call(
+                        fetch_order, is_cancelled,
+                        lambda e, attempt, delay: on_retry(f"заказа {order_header.id}", e, attempt, delay)
+                    )
+                except RetryCancelled:
+                    return None
+                except transport_errors as e:
+                    order_fetch_failed(order_header, e)
+                    return None
+                
+                record = parse_record(order_header, html)
+                store_order_html(order_header, html, record)
+                return record
+            
+            async def process_order_async(fetcher, order_header):
+                while self.is_paused and self.is_running:
+                    await asyncio.sleep(0.1)
+                
+                if is_cancelled():
+                    return None
+                
+                html = cached_html(order_header)
+                if html is not None:
+                    return await parse_record_async(order_header, html)
+                
+                async def fetch_order():
+                    return await paced_async(lambda: fetcher.fetch_order_html(order_header.id))
+                
+                try:
+                    html = await retry_policy.call_async(
+                        fetch_order, is_cancelled,
+                        lambda e, attempt, delay: on_retry(f"заказа {order_header.id}", e, attempt, delay)
+                    )
+                except RetryCancelled:
+                    return None
+                except transport_errors as e:
+                    order_fetch_failed(order_header, e)
+                    return None
+                
+                record = await parse_record_async(order_header, html)
+                store_order_html(order_header, html, record)
+                return record
+            
+            def order_lot(order_header):
+                # Лот заказа - по описанию из списка продаж (у заказов из контрольной точки оно сохранено)
+                return matcher.match(getattr(order_header, 'description', '')) or matcher.lots[0]
+            
+            def remember_keys(order_header, record, lot):
+                # Продажи этих же ключей в других заказах, в том числе в прошлых запусках
+                if not key_index or not record or not record['keys']:
+                    return {}
+                try:
+                    return key_index.record_order(order_header.id, record['keys'], game_id, lot, record['date'])
+                except Exception as e:
+                    self.log(f"⚠️ Не удалось обновить историю ключей: {e}")
+                    return {}
+            
+            def finish_order(order_header, record):
+                keys = record['keys'] if record else None
+                lot = order_lot(order_header)
+                seen = remember_keys(order_header, record, lot)
+                with results_lock:
+                    # Неудачные заказы остаются в pending и повторятся при продолжении
+                    if record is not None:
+                        processed_ids.add(order_header.id)
+                        pending.pop(order_header.id, None)
+                        self.order_records[order_header.id] = record
+                        lot_stats[lot]['orders'] += 1
+                        lot_stats[lot]['keys'] += len(keys)
+                    stats['processed'] += 1
+                    processed, matched = stats['processed'], stats['matched']
+                    new_rows = []
+                    for key in keys or []:
+                        key_data = self.all_sold_keys.add(key, order_header.id, record['date'], seen.get(key), lot)
+                        new_rows.append((len(self.all_sold_keys), key_data))
+                    if record is not None and self.checkpoint_file:
+                        unsaved_orders.append(AnalysisCheckpoint.journal_entry(
+                            record, [key_data.to_dict() for _, key_data in new_rows]))
+                
+                # Ключи и запись уже в контрольной точке - отдаем их и после остановки,
+                # иначе при продолжении они не попадут в вывод
+                if record is not None:
+                    self.emit(EVENT_RECORD, record)
+                if new_rows:
+                    self.emit(EVENT_KEYS, new_rows)
+                
+                if not self.is_running:
+                    return
+                
+                self.emit(EVENT_PROGRESS, processed, matched)
+                self.emit_pacing(pacer)
+                self.log(f"🔍 Заказ {order_header.id} ({processed}/{matched})")
+                if keys:
+                    self.log(f"✅ Найдено ключей: {len(keys)}")
+                elif keys is not None:
+                    self.log("⚠️ Ключи не найдены в заказе")
+                if seen:
+                    self.log(f"🕘 Ранее проданы в других заказах: {len(seen)}")
+            
+            def consume_orders():
+                while True:
+                    order_header = order_queue.get()
+                    if order_header is None:
+                        return
+                    if is_cancelled() or order_header.id in processed_ids:
+                        continue
+                    
+                    try:
+                        record = process_order(order_header)
+                    except Exception as e:
+                        self.log(f"❌ Неожиданная ошибка при обработке заказа {order_header.id}: {e}")
+                        record = None
+                    finish_order(order_header, record)
+            
+            async def consume_orders_async():
+                # Один поток с циклом событий: до workers запросов одновременно
+                # через общий пул keep-alive соединений
+                loop = asyncio.get_running_loop()
+                slots = asyncio.Semaphore(workers)
+                tasks = set()
+                
+                async def run_order(order_header):
+                    try:
+                        record = await process_order_async(fetcher, order_header)
+                    except Exception as e:
+                        self.log(f"❌ Неожиданная ошибка при обработке заказа {order_header.id}: {e}")
+                        record = None
+                    finally:
+                        slots.release()
+                    finish_order(order_header, record)
+                
+                async with AsyncOrderFetcher.from_account(self.account, max_connections=workers) as fetcher:
+                    while True:
+                        order_header = await loop.run_in_executor(None, order_queue.get)
+                        if order_header is None:
+                            break
+                        if is_cancelled() or order_header.id in processed_ids:
+                            continue
+                        await slots.acquire()
+                        task = asyncio.ensure_future(run_order(order_header))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    if tasks:
+                        await asyncio.gather(*tasks)
+            
+            def feed_orders(orders):
+                try:
+                    for order in orders:
+                        if not enqueue(order):
+                            return
+                finally:
+                    for _ in range(consumer_count):
+                        enqueue(None)
+            
+            def run_pipeline(feeder, *args):
+                feeder_thread = threading.Thread(target=feeder, args=args, daemon=True)
+                feeder_thread.start()
+                with ThreadPoolExecutor(max_workers=consumer_count) as executor:
+                    if use_async:
+                        consumers = [executor.submit(asyncio.run, consume_orders_async())]
+                    else:
+                        consumers = [executor.submit(consume_orders) for _ in range(consumer_count)]
+                    while wait(consumers, timeout=CHECKPOINT_INTERVAL).not_done:
+                        save_checkpoint()
+                feeder_thread.join()
+            
+            try:
+                run_pipeline(produce_orders)
+                
+                # Заказы с ошибками повторяем одной партией в конце запуска
+                if dead_letters and not is_cancelled():
+                    with results_lock:
+                        retry_batch = list(dead_letters)
+                        dead_letters.clear()
+                        stats['processed'] -= len(retry_batch)
+                    self.log(f"🔁 Повторяю заказы с ошибками: {len(retry_batch)}")
+                    run_pipeline(feed_orders, retry_batch)
+                
+                if dead_letters:
+                    failed_ids = ", ".join(order.id for order in dead_letters)
+                    self.log(f"❌ Не удалось загрузить заказов: {len(dead_letters)} ({failed_ids})")
+            finally:
+                if order_cache:
+                    order_cache.close()
+                if parse_pool:
+                    parse_pool.close()
+                if key_index:
+                    key_index.close()
+            
+            # Полностью завершенный анализ не нужно продолжать
+            complete = self.is_running and not abort.is_set() and checkpoint.paging_done and not pending
+            if complete:
+                if self.checkpoint_file:
+                    AnalysisCheckpoint.remove(self.checkpoint_file)
+            elif self.checkpoint_file:
+                save_checkpoint()
+                self.log("💾 Прогресс сохранен - анализ можно продолжить с этого места")
+            
+            # Финальная статистика - уже посчитана по мере добавления ключей
+            key_stats = self.all_sold_keys.stats
+            total_keys, unique_keys, duplicates = key_stats.total, key_stats.unique, key_stats.duplicates
+            summary.update(key_stats.as_dict())
+            summary.update({
+                'pages': stats['pages'],
+                'matched': stats['matched'],
+                'cached': stats['cached'],
+                'failed': len(dead_letters),
+                'lots': lot_stats,
+            })
+            
+            if abort.is_set():
+                summary['status'] = STATUS_UNAUTHORIZED
+                return summary
+            
+            if not self.is_running:
+                summary['status'] = STATUS_STOPPED
+                return summary
+            
+            if not stats['matched']:
+                self.log("❌ Заказы с указанным названием лота не найдены")
+                summary['status'] = STATUS_NOT_FOUND
+                return summary
+            
+            summary['status'] = STATUS_COMPLETED if complete else STATUS_INCOMPLETE
+            
+            self.log(f"🎉 Анализ завершен!")
+            self.log(f"📊 Всего ключей: {total_keys}")
+            self.log(f"🔑 Уникальных: {unique_keys}")
+            self.log(f"👥 Дубликатов: {duplicates}")
+            if key_index:
+                self.log(f"🕘 Ранее проданных в других заказах: {key_stats.seen_before}")
+            self.log(f"📄 Обработано страниц: {stats['pages']}")
+            self.log(f"📦 Найдено подходящих заказов: {stats['matched']}")
+            if len(lot_stats) > 1:
+                for lot, counts in lot_stats.items():
+                    self.log(f"   • {lot}: заказов {counts['orders']}, ключей {counts['keys']}")
+            if order_cache:
+                self.log(f"💾 Взято из кэша: {stats['cached']}")
+            return summary
+            
+        except Exception as e:
+            self.log(f"❌ Критическая ошибка: {e}")
+            return summary
+        finally:
+            self.is_running = False
+            self.is_paused = False
+            self.emit(EVENT_FINISHED, summary)
+    
+    @staticmethod
+    def filter_orders_batch(orders_batch, lot_name, limit=None):
+        """Отбор заказов страницы по названию лота, списку лотов или LotMatcher (не больше limit)"""
+        matcher = lot_name if isinstance(lot_name, LotMatcher) else LotMatcher(lot_name)
+        matched = []
+        for order in orders_batch:
+            if limit is not None and len(matched) >= limit:
+                break
+            if matcher.matches(getattr(order, 'description', '')):
+                matched.append(order)
+        return matched
+    
+    @staticmethod
+    def describe_error(e):
+        """Короткое описание ошибки запроса для лога"""
+        short_str = getattr(e, 'short_str', None)
+        return short_str() if callable(short_str) else str(e)
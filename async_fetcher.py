@@ -0,0 +1,96 @@
+"""
+Асинхронная загрузка страниц заказов через пул keep-alive соединений (aiohttp)
+"""
+import asyncio
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+FUNPAY_URL = "https://funpay.com"
+
+
+class AsyncFetchError(Exception):
+    """Ошибка запроса (статус-код != 200 или сетевая ошибка)"""
+
+    def __init__(self, url, status_code=None, response=None, reason=None):
+        super().__init__(url, status_code, reason)
+        self.url = url
+        self.status_code = status_code
+        self.response = response  # Нужен для чтения Retry-After
+        self.reason = reason
+
+    def short_str(self):
+        if self.status_code is None:
+            return f"Ошибка запроса к {self.url}: {self.reason}"
+        return f"Ошибка запроса к {self.url}. (Статус-код: {self.status_code})"
+
+    def __str__(self):
+        return self.short_str()
+
+
+class AsyncUnauthorizedError(AsyncFetchError):
+    """Нет авторизации (403 или страница без данных пользователя)"""
+
+    def short_str(self):
+        return "Не авторизирован (возможно, введен неверный golden_key?)."
+
+
+class AsyncOrderFetcher:
+    """Загружает HTML заказов с той же авторизацией, что и FunPayAPI.Account
+    (golden_key, PHPSESSID, user_agent), переиспользуя TLS-соединения"""
+
+    def __init__(self, golden_key, user_agent=None, phpsessid=None, max_connections=100,
+                 timeout=10, base_url=FUNPAY_URL):
+        if not HAS_AIOHTTP:
+            raise RuntimeError("Для асинхронной загрузки установите aiohttp: pip install aiohttp")
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = {"accept": "*/*", "cookie": f"golden_key={golden_key}"}
+        if phpsessid:
+            self.headers["cookie"] += f"; PHPSESSID={phpsessid}"
+        if user_agent:
+            self.headers["user-agent"] = user_agent
+        self.session = None
+
+    @classmethod
+    def from_account(cls, account, **kwargs):
+        """Создание из авторизованного FunPayAPI.Account"""
+        kwargs.setdefault("timeout", getattr(account, "requests_timeout", 10))
+        # Аккаунт может указывать на другой адрес (локальная заглушка FunPay)
+        kwargs.setdefault("base_url", getattr(account, "base_url", FUNPAY_URL))
+        return cls(account.golden_key, account.user_agent, getattr(account, "phpsessid", None), **kwargs)
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def fetch_order_html(self, order_id):
+        """HTML страницы заказа (тот же, что FunPayAPI.types.Order.html)"""
+        url = f"{self.base_url}/orders/{order_id}/"
+        try:
+            async with self.session.get(url) as response:
+                if response.status == 403:
+                    raise AsyncUnauthorizedError(url, response.status, response)
+                if response.status != 200:
+                    raise AsyncFetchError(url, response.status, response)
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AsyncFetchError(url, reason=e.__class__.__name__) from e
+
+        # Как и FunPayAPI: без блока пользователя страница считается неавторизованной
+        if "user-link-name" not in html:
+            raise AsyncUnauthorizedError(url, response.status, response)
+        return html
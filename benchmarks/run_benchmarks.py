@@ -0,0 +1,206 @@
+"""
+Замеры скорости: извлечение ключей на синтетических страницах и полный анализ против локальной замены FunPay
+
+Пример:
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py -o new.json --compare old.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from analysis_engine import STATUS_COMPLETED, AnalysisEngine, AnalysisSettings
+from async_fetcher import HAS_AIOHTTP
+from cassette import ReplayAccount
+from funpay_standin import FunPayStandIn, StandInAccount, make_order_page
+from key_extractor import available_backends, get_extractor
+from order_record import parse_order_page
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+PAGE_SIZES = [1024, 16 * 1024, 128 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+QUICK_PAGE_SIZES = [1024, 16 * 1024, 128 * 1024, 1024 * 1024]
+KEYS_PER_PAGE = 5
+
+
+def measure(func, duration):
+    """Операций в секунду (не меньше одного вызова) и пик памяти Python-аллокаций одного вызова"""
+    func()  # Прогрев
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            break
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return calls / elapsed, peak
+
+
+def bench_extraction(sizes, duration):
+    results = []
+    for size in sizes:
+        for with_secrets in (True, False):
+            keys = [f"KEY{i:05d}-BENCH-KEY" for i in range(KEYS_PER_PAGE)] if with_secrets else []
+            html = make_order_page("B0000001", keys, size)
+            cases = [(f"extract:{backend}", get_extractor(backend)) for backend in available_backends()]
+            cases.append(("record:auto", lambda page: parse_order_page(page, "B0000001")))
+            for name, func in cases:
+                ops, peak = measure(lambda: func(html), duration)
+                result = {
+                    'name': f"{name}/{size // 1024}KB/{'keys' if with_secrets else 'nokeys'}",
+                    'page_bytes': len(html.encode()),
+                    'ops_per_sec': round(ops, 2),
+                    'mb_per_sec': round(ops * len(html.encode()) / 1024 / 1024, 2),
+                    'peak_memory_kb': round(peak / 1024, 1),
+                }
+                results.append(result)
+                print(f"{result['name']:<40} {result['ops_per_sec']:>12.1f} оп/с "
+                      f"{result['mb_per_sec']:>10.1f} МБ/с {result['peak_memory_kb']:>10.1f} КБ")
+    return results
+
+
+def bench_pipeline(orders, latency, workers, keys_per_order, modes):
+    results = []
+    for mode in modes:
+        standin = FunPayStandIn(orders=orders, keys_per_order=keys_per_order, latency=latency)
+        base_url = standin.start()
+        try:
+            account = StandInAccount(base_url).get()
+            settings = AnalysisSettings(min_delay=0, max_delay=0, workers=workers, max_retries=1,
+                                        async_http=(mode == "async"), cache_enabled=False)
+            engine = AnalysisEngine(account, settings, cache_file=None, checkpoint_file=None, key_index_file=None)
+            started = time.perf_counter()
+            summary = engine.run(1, standin.lot_name)
+            elapsed = time.perf_counter() - started
+        finally:
+            standin.stop()
+        result = {
+            'name': f"pipeline:{mode}/{orders}orders/{int(latency * 1000)}ms/{workers}workers",
+            'seconds': round(elapsed, 3),
+            'orders_per_sec': round(orders / elapsed, 2),
+            'requests': standin.stats['requests'],
+            'ok': summary['status'] == STATUS_COMPLETED and summary.get('total_keys') == standin.expected_keys()[0],
+        }
+        results.append(result)
+        print(f"{result['name']:<40} {result['seconds']:>8.2f} сек {result['orders_per_sec']:>10.1f} заказов/с"
+              f"{'' if result['ok'] else '  (НЕВЕРНЫЙ РЕЗУЛЬТАТ)'}")
+    return results
+
+
+def bench_replay(path, backends):
+    """Повтор записанной сессии (cassette.py) разными движками извлечения"""
+    account = ReplayAccount(path).get()
+    game_id, lot_name = account.header.get('game_id'), account.header.get('lot_name')
+    results = []
+    for backend in backends:
+        settings = AnalysisSettings(workers=4, parser_backend=backend)
+        engine = AnalysisEngine(account, settings, cache_file=None, checkpoint_file=None, key_index_file=None)
+        started = time.perf_counter()
+        summary = engine.run(game_id, lot_name)
+        elapsed = time.perf_counter() - started
+        orders = summary.get('matched', 0)
+        result = {
+            'name': f"replay:{backend}/{os.path.basename(path)}",
+            'seconds': round(elapsed, 3),
+            'orders_per_sec': round(orders / elapsed, 2),
+            'ok': summary['status'] == STATUS_COMPLETED,
+        }
+        results.append(result)
+        print(f"{result['name']:<40} {result['seconds']:>8.2f} сек {result['orders_per_sec']:>10.1f} заказов/с"
+              f"{'' if result['ok'] else '  (НЕВЕРНЫЙ РЕЗУЛЬТАТ)'}")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Изменение скорости относительно сохраненного прогона"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {r['name']: r for r in baseline.get('extraction', []) + baseline.get('pipeline', [])}
+    print(f"\nСравнение с {baseline_path} ({baseline['meta'].get('revision')}):")
+    for result in results['extraction'] + results['pipeline']:
+        previous = old.get(result['name'])
+        metric = 'ops_per_sec' if 'ops_per_sec' in result else 'orders_per_sec'
+        if not previous or not previous.get(metric):
+            continue
+        change = (result[metric] / previous[metric] - 1) * 100
+        marker = "  <-- регресс" if change < -20 else ""
+        print(f"{result['name']:<40} {change:>+8.1f}%{marker}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости FunPay Key Checker")
+    parser.add_argument("--quick", action="store_true", help="короткий прогон (страницы до 1 МБ, меньше заказов)")
+    parser.add_argument("--duration", type=float, help="секунд на каждый замер извлечения")
+    parser.add_argument("--orders", type=int, help="заказов в полном анализе")
+    parser.add_argument("--latency-ms", type=float, default=20, help="задержка ответа замены FunPay, мс")
+    parser.add_argument("--workers", type=int, default=16, help="параллельных загрузок")
+    parser.add_argument("--keys-per-order", type=int, default=1)
+    parser.add_argument("--skip-extraction", action="store_true")
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--cassette", help="кассета записанной сессии (cli_main.py --record) для замера повтора")
+    parser.add_argument("-o", "--output", help="файл результатов JSON (по умолчанию benchmarks/results/)")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    duration = args.duration or (0.2 if args.quick else 1.0)
+    orders = args.orders or (300 if args.quick else 2000)
+    modes = ["sync", "async"] if HAS_AIOHTTP else ["sync"]
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'backends': available_backends(),
+        },
+        'extraction': [],
+        'pipeline': [],
+    }
+    if not args.skip_extraction:
+        results['extraction'] = bench_extraction(QUICK_PAGE_SIZES if args.quick else PAGE_SIZES, duration)
+    if not args.skip_pipeline:
+        results['pipeline'] = bench_pipeline(orders, args.latency_ms / 1000, args.workers,
+                                             args.keys_per_order, modes)
+    if args.cassette:
+        results['pipeline'] += bench_replay(args.cassette, available_backends())
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0 if all(r['ok'] for r in results['pipeline']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
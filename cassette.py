@@ -0,0 +1,149 @@
+"""
+Запись и повтор сессии анализа: ответы FunPay (главная страница, страницы продаж, страницы заказов)
+сохраняются в сжатый файл-кассету, а ReplayAccount отдает их движку без сети и без задержек.
+
+Кассета - JSONL в gzip: первая строка - заголовок, далее по строке на ответ
+{"method", "path", "payload", "status", "body"}
+"""
+import gzip
+import json
+import threading
+import time
+
+import requests
+
+import FunPayAPI
+from FunPayAPI.common import exceptions
+
+from async_fetcher import FUNPAY_URL
+
+CASSETTE_VERSION = 1
+
+
+def request_key(request_method, api_method, payload=None, base_url=FUNPAY_URL):
+    """Ключ ответа в кассете: метод, путь без адреса сайта и тело запроса"""
+    path = api_method
+    for prefix in (base_url, FUNPAY_URL):
+        if prefix and path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    path = path.lstrip("/")
+    body = json.dumps(payload or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return request_method.lower(), path, body
+
+
+def order_path(order_id):
+    """Путь страницы заказа (как в analysis_engine.fetch_order_html)"""
+    return f"orders/{order_id}/"
+
+
+class CassetteRecorder:
+    """Запись ответов в кассету (потокобезопасно, повторный ответ на тот же запрос не пишется)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._header_written = False
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def record(self, request_method, api_method, payload, status, body, base_url=FUNPAY_URL):
+        key = request_key(request_method, api_method, payload, base_url)
+        with self._lock:
+            if key in self._seen or self._file is None or not self._header_written:
+                return
+            self._seen.add(key)
+            method, path, payload_json = key
+            self._write({'method': method, 'path': path, 'payload': json.loads(payload_json),
+                         'status': status, 'body': body})
+            self.entries += 1
+
+    def record_order(self, order_id, html):
+        """Страница заказа, загруженная в обход account.method (aiohttp, кэш)"""
+        self.record("get", order_path(order_id), {}, 200, html)
+
+    def attach(self, account, game_id=None, lot_name=None):
+        """Запись всех запросов аккаунта: account.method заменяется оберткой.
+        game_id и lot_name сохраняются в заголовке - по ним повтор запускается без параметров"""
+        with self._lock:
+            if not self._header_written:
+                self._write({'cassette': CASSETTE_VERSION, 'created': time.time(),
+                             'game_id': game_id, 'lot_name': lot_name})
+                self._header_written = True
+        if getattr(account, "cassette_recorder", None) is self:
+            return account
+        original_method = account.method
+        base_url = getattr(account, "base_url", FUNPAY_URL)
+
+        def method(request_method, api_method, headers, payload, *args, **kwargs):
+            response = original_method(request_method, api_method, headers, payload, *args, **kwargs)
+            if response.status_code == 200:
+                self.record(request_method, api_method, payload, response.status_code,
+                            response.content.decode(), base_url)
+            return response
+
+        account.method = method
+        account.cassette_recorder = self
+        # Главная страница уже загружена при авторизации - без нее повтор не пройдет Account.get()
+        if getattr(account, "html", None):
+            self.record("get", FUNPAY_URL, {}, 200, account.html)
+        return account
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_cassette(path):
+    """(заголовок, {ключ запроса: (статус, тело)}) из файла кассеты"""
+    responses = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get('cassette') != CASSETTE_VERSION:
+            raise ValueError(f"{path}: неизвестный формат кассеты")
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = request_key(entry['method'], entry['path'], entry['payload'])
+            responses[key] = (entry['status'], entry['body'])
+    return header, responses
+
+
+class ReplayAccount(FunPayAPI.Account):
+    """FunPayAPI.Account, отвечающий из кассеты: без сети, задержек и golden_key"""
+
+    offline = True  # Движок не ждет между запросами и не использует aiohttp и кэш
+
+    def __init__(self, path, **kwargs):
+        super().__init__("replay", **kwargs)
+        self.cassette_path = path
+        self.header, self.responses = load_cassette(path)
+        self.phpsessid = "replay"
+
+    def method(self, request_method, api_method, headers, payload, exclude_phpsessid=False, raise_not_200=False):
+        key = request_key(request_method, api_method, payload)
+        status, body = self.responses.get(key, (404, ""))
+        response = requests.Response()
+        response.status_code = status
+        response._content = body.encode()
+        response.encoding = "utf-8"
+        response.url = f"{FUNPAY_URL}/{key[1]}"
+        response.request = requests.Request(request_method.upper(), response.url, data=payload).prepare()
+        if status == 403:
+            raise exceptions.UnauthorizedError(response)
+        if status != 200 and raise_not_200:
+            raise exceptions.RequestFailedError(response)
+        return response
@@ -0,0 +1,126 @@
+"""
+Контрольные точки анализа: позволяют продолжить прерванный запуск
+"""
+import json
+import os
+import time
+from types import SimpleNamespace
+
+CHECKPOINT_VERSION = 2
+JOURNAL_SUFFIX = ".orders.jsonl"
+
+
+class AnalysisCheckpoint:
+    """Состояние анализа: курсор пагинации и необработанные заказы - в файле контрольной точки,
+    обработанные заказы с записями о них и ключами - в журнале рядом с ним (путь + JOURNAL_SUFFIX).
+    Журнал только дописывается, поэтому сохранение не зависит от числа уже найденных ключей"""
+
+    def __init__(self, game_id, lot_name, start_from=None, page_num=1, paging_done=False,
+                 matched=0, pending=None, processed_ids=None, keys=None, records=None, saved_at=None):
+        self.game_id = game_id
+        self.lot_name = lot_name
+        self.start_from = start_from        # Курсор следующей страницы get_sells
+        self.page_num = page_num            # Номер следующей страницы
+        self.paging_done = paging_done      # Пагинация завершена
+        self.matched = matched              # Сколько заказов уже прошло фильтр
+        self.pending = pending or []        # Заказы, прошедшие фильтр, но еще не обработанные
+        self.processed_ids = processed_ids or []
+        self.keys = keys or []
+        self.records = records or []        # Записи о заказах (order_record.parse_order_page)
+        self.saved_at = saved_at
+
+    @staticmethod
+    def order_date(order_header):
+        """Дата заказа из списка продаж (у OrderShortcut это date, у восстановленных заказов - created_at)"""
+        date = getattr(order_header, 'created_at', None) or getattr(order_header, 'date', None)
+        return str(date) if date else 'Неизвестно'
+
+    @staticmethod
+    def order_to_dict(order_header):
+        """Минимальные данные заказа из списка продаж, нужные для повторной обработки"""
+        return {
+            'id': order_header.id,
+            'description': getattr(order_header, 'description', ''),
+            'created_at': AnalysisCheckpoint.order_date(order_header),
+        }
+
+    @staticmethod
+    def journal_path(path):
+        return path + JOURNAL_SUFFIX
+
+    @staticmethod
+    def journal_entry(record, keys):
+        """Строка журнала об обработанном заказе: запись о заказе и словари его ключей"""
+        return {'record': record, 'keys': keys}
+
+    def pending_orders(self):
+        """Необработанные заказы в виде объектов с атрибутами как у OrderShortcut"""
+        return [SimpleNamespace(**order) for order in self.pending]
+
+    def to_dict(self):
+        return {
+            'version': CHECKPOINT_VERSION,
+            'game_id': self.game_id,
+            'lot_name': self.lot_name,
+            'start_from': self.start_from,
+            'page_num': self.page_num,
+            'paging_done': self.paging_done,
+            'matched': self.matched,
+            'pending': self.pending,
+            'saved_at': self.saved_at,
+        }
+
+    def save(self, path, orders=()):
+        """Дописывает в журнал заказы, обработанные после прошлого сохранения (journal_entry),
+        и атомарно перезаписывает файл состояния (сначала во временный файл)"""
+        if orders:
+            with open(self.journal_path(path), "a", encoding="utf-8") as f:
+                for entry in orders:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self.saved_at = time.time()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Загрузка контрольной точки или None, если ее нет или она повреждена"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.pop('version', None) != CHECKPOINT_VERSION:
+            return None
+        checkpoint = cls(**data)
+        processed = {}
+        try:
+            with open(cls.journal_path(path), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Оборванная строка (сбой во время сохранения)
+                    order_id = entry['record']['order_id']
+                    if order_id in processed:
+                        continue  # Повтор после неудачного сохранения
+                    processed[order_id] = True
+                    checkpoint.records.append(entry['record'])
+                    checkpoint.keys.extend(entry['keys'])
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return None
+        checkpoint.processed_ids = list(processed)
+        # Заказ мог попасть в журнал, а файл состояния - не успеть обновиться
+        checkpoint.pending = [order for order in checkpoint.pending if order['id'] not in processed]
+        return checkpoint
+
+    @staticmethod
+    def remove(path):
+        for file_path in (path, AnalysisCheckpoint.journal_path(path)):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,237 @@
+"""
+Консольный (headless) запуск анализа без GUI: ключи выводятся в JSONL
+
+Пример:
+    python cli_main.py --game-id 1234 --lot "Название лота" -o keys.jsonl
+"""
+import argparse
+import configparser
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Коды завершения
+EXIT_OK = 0             # Анализ завершен полностью
+EXIT_ERROR = 1          # Критическая ошибка
+EXIT_USAGE = 2          # Неверные аргументы или конфигурация
+EXIT_UNAUTHORIZED = 3   # Ошибка авторизации (golden_key)
+EXIT_INCOMPLETE = 4     # Часть страниц/заказов не загружена, прогресс сохранен
+EXIT_NOT_FOUND = 5      # Нет заказов с указанным лотом
+EXIT_INTERRUPTED = 130  # Остановлено пользователем (Ctrl+C)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="FunPay Key Checker - анализ проданных ключей без GUI (вывод в JSONL)"
+    )
+    parser.add_argument("--game-id", type=int, help="ID игры")
+    parser.add_argument("--lot", action="append",
+                        help="название лота (подстрока описания заказа); можно указать несколько раз - "
+                             "все лоты ищутся за один проход по истории продаж")
+    parser.add_argument("--config", default="config.ini", help="путь к config.ini (по умолчанию: %(default)s)")
+    parser.add_argument("--funpay-url", help="адрес FunPay (например, локальной замены funpay_standin.py)")
+    parser.add_argument("--record", metavar="CASSETTE", help="записать ответы FunPay в файл-кассету (.jsonl.gz)")
+    parser.add_argument("--replay", metavar="CASSETTE", help="анализ по записанной кассете, без сети и задержек")
+    parser.add_argument("-o", "--output", help="файл для ключей JSONL (по умолчанию stdout)")
+    parser.add_argument("--export", metavar="FILE",
+                        help="после анализа выгрузить ключи с заказом, датой, лотом и числом продаж "
+                             "(.csv, .jsonl, .parquet, .txt; сжатие .gz/.zst по расширению)")
+    parser.add_argument("--export-kind", choices=("all", "unique", "duplicates", "report"), default="all",
+                        help="какие ключи выгружать в --export: report - все продажи повторенных ключей, "
+                             "самые тяжелые группы первыми (по умолчанию: %(default)s)")
+    parser.add_argument("--records", help="файл JSONL с записями о заказах (ключи, покупатель, сумма, описание)")
+    parser.add_argument("--order-limit", type=int, help="лимит заказов (0 = без лимита)")
+    parser.add_argument("--page-limit", type=int, help="лимит страниц (0 = без лимита)")
+    parser.add_argument("--workers", type=int, help="параллельных загрузок заказов")
+    parser.add_argument("--min-delay", type=float, help="минимальный интервал между запросами, сек")
+    parser.add_argument("--max-delay", type=float, help="максимальный интервал между запросами, сек")
+    parser.add_argument("--max-retries", type=int, help="попыток на запрос")
+    parser.add_argument("--sync", action="store_true", help="загружать заказы в потоках, без aiohttp")
+    parser.add_argument("--cache", help="файл кэша заказов (SQLite)")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш заказов")
+    parser.add_argument("--history", help="файл истории ключей между запусками (SQLite)")
+    parser.add_argument("--no-history", action="store_true", help="не искать ключи, проданные в прошлых запусках")
+    parser.add_argument("--parser", help="движок извлечения ключей: auto, regex, selectolax, lxml, bs4")
+    parser.add_argument("--process-pool", action="store_true", default=None,
+                        help="извлекать ключи в пуле процессов по числу ядер")
+    parser.add_argument("--checkpoint", help="файл контрольной точки (без него прогресс не сохраняется)")
+    parser.add_argument("--resume", action="store_true", help="продолжить анализ из --checkpoint")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не выводить лог в stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.resume and not args.checkpoint:
+        print("Ошибка: для --resume укажите --checkpoint", file=sys.stderr)
+        return EXIT_USAGE
+    if not args.resume and not args.replay and (args.game_id is None or not args.lot):
+        print("Ошибка: укажите --game-id и --lot (или --resume, --replay)", file=sys.stderr)
+        return EXIT_USAGE
+
+    config = configparser.ConfigParser()
+    if os.path.exists(args.config):
+        config.read(args.config, encoding="utf-8")
+
+    if args.record and args.replay:
+        print("Ошибка: --record и --replay нельзя использовать вместе", file=sys.stderr)
+        return EXIT_USAGE
+
+    golden_key = os.environ.get("FUNPAY_GOLDEN_KEY") or config.get("FunPay", "golden_key", fallback="")
+    if not args.replay and (not golden_key or golden_key == "YOUR_GOLDEN_KEY_HERE"):
+        print(f"Ошибка: golden_key не задан ни в {args.config}, ни в FUNPAY_GOLDEN_KEY", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        from FunPayAPI.common import exceptions
+        from analysis_engine import (CACHE_FILE, EVENT_FINISHED, EVENT_KEYS, EVENT_LOG, EVENT_RECORD,
+                                     KEY_INDEX_FILE, STATUS_COMPLETED, STATUS_INCOMPLETE, STATUS_NOT_FOUND,
+                                     STATUS_STOPPED, STATUS_UNAUTHORIZED, AnalysisEngine, AnalysisSettings,
+                                     create_account, dispatch_events)
+        from cassette import CassetteRecorder, ReplayAccount
+        from checkpoint import AnalysisCheckpoint
+    except ImportError as e:
+        print(f"Ошибка: Не установлены необходимые библиотеки: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    try:
+        settings = AnalysisSettings.from_config(
+            config,
+            order_limit=args.order_limit,
+            page_limit=args.page_limit,
+            workers=args.workers,
+            min_delay=args.min_delay,
+            max_delay=args.max_delay,
+            max_retries=args.max_retries,
+            async_http=False if args.sync else None,
+            cache_enabled=False if args.no_cache else None,
+            history_enabled=False if args.no_history else None,
+            parser_backend=args.parser,
+            process_pool=args.process_pool
+        )
+    except ValueError as e:
+        print(f"Ошибка в {args.config}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    checkpoint = None
+    game_id, lot_name = args.game_id, args.lot
+    if args.resume:
+        checkpoint = AnalysisCheckpoint.load(args.checkpoint)
+        if not checkpoint:
+            print(f"Ошибка: нет сохраненного прогресса в {args.checkpoint}", file=sys.stderr)
+            return EXIT_USAGE
+        game_id, lot_name = checkpoint.game_id, checkpoint.lot_name
+
+    def log(message, created=None):
+        if not args.quiet:
+            moment = datetime.fromtimestamp(created) if created else datetime.now()
+            timestamp = moment.strftime("%H:%M:%S")
+            print(f"[{timestamp}] {message}", file=sys.stderr, flush=True)
+
+    try:
+        if args.replay:
+            account = ReplayAccount(args.replay).get()
+            # По умолчанию - игра и лот, с которыми кассета записана
+            if game_id is None:
+                game_id = account.header.get('game_id')
+            lot_name = lot_name or account.header.get('lot_name')
+        else:
+            account = create_account(golden_key, config.get("FunPay", "user_agent", fallback=None),
+                                     base_url=args.funpay_url)
+    except exceptions.UnauthorizedError:
+        log("❌ Ошибка: Неверный Golden Key или проблемы с авторизацией")
+        return EXIT_UNAUTHORIZED
+    except Exception as e:
+        log(f"❌ Ошибка подключения: {e}")
+        return EXIT_ERROR
+    log(f"✅ Подключение успешно! Пользователь: {account.username} (ID: {account.id})")
+    if game_id is None or not lot_name:
+        log("❌ Ошибка: в кассете нет игры и лота - укажите --game-id и --lot")
+        return EXIT_USAGE
+
+    mode = "a" if args.resume else "w"
+    output = open(args.output, mode, encoding="utf-8") if args.output else sys.stdout
+    records_output = open(args.records, mode, encoding="utf-8") if args.records else None
+
+    def write_keys(rows):
+        output.write("".join(json.dumps(key_data.to_dict(), ensure_ascii=False, default=str) + "\n"
+                             for _, key_data in rows))
+        output.flush()
+
+    def write_record(record):
+        records_output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    result = {}
+    handlers = {
+        EVENT_LOG: log,
+        EVENT_KEYS: write_keys,
+        EVENT_FINISHED: result.update,
+    }
+    if records_output:
+        handlers[EVENT_RECORD] = write_record
+    cassette = CassetteRecorder(args.record) if args.record else None
+    engine = AnalysisEngine(
+        account, settings,
+        cache_file=args.cache or CACHE_FILE,
+        checkpoint_file=args.checkpoint,
+        cassette=cassette,
+        key_index_file=args.history or KEY_INDEX_FILE
+    )
+
+    # Движок работает в отдельном потоке, чтобы Ctrl+C корректно останавливал анализ
+    # и контрольная точка успевала сохраниться; события разбираются здесь, в главном потоке.
+    # Ctrl+C только ставит флаг: KeyboardInterrupt мог прервать join (is_alive() после этого
+    # ложно, и процесс завершался до сохранения) или разбор событий (ключи терялись)
+    stop_requested = threading.Event()
+    previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: stop_requested.set())
+    worker = threading.Thread(target=engine.run, args=(game_id, lot_name, checkpoint), daemon=True)
+    worker.start()
+    interrupted = False
+    try:
+        # Ждем итогового события движка - после остановки он еще сохраняет контрольную точку
+        while 'status' not in result and worker.is_alive():
+            time.sleep(0.2)
+            dispatch_events(engine.events, handlers)
+            if stop_requested.is_set() and not interrupted:
+                log("🛑 Остановка... (сохраняю прогресс)")
+                interrupted = True
+                engine.stop()
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+    dispatch_events(engine.events, handlers)
+    if output is not sys.stdout:
+        output.close()
+    if records_output:
+        records_output.close()
+    if cassette:
+        cassette.close()
+        log(f"📼 Кассета сохранена: {args.record} (ответов: {cassette.entries})")
+    if args.export:
+        from exporters import export_store
+        try:
+            count = export_store(engine.all_sold_keys, args.export, args.export_kind)
+            log(f"💾 Экспорт: {count} строк в {args.export}")
+        except (OSError, RuntimeError, ValueError) as e:
+            log(f"❌ Ошибка экспорта: {e}")
+            return EXIT_ERROR
+
+    status = result.get('status')
+    if interrupted or status == STATUS_STOPPED:
+        return EXIT_INTERRUPTED
+    return {
+        STATUS_COMPLETED: EXIT_OK,
+        STATUS_INCOMPLETE: EXIT_INCOMPLETE,
+        STATUS_NOT_FOUND: EXIT_NOT_FOUND,
+        STATUS_UNAUTHORIZED: EXIT_UNAUTHORIZED,
+    }.get(status, EXIT_ERROR)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Потоковый экспорт результатов в CSV, JSONL, Parquet и TXT (с необязательным сжатием gzip/zstd):
+строки берутся из хранилища пачками, память не растет с числом ключей
+"""
+import csv
+import gzip
+import io
+import os
+from itertools import islice
+from json.encoder import encode_basestring
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet", "txt")
+COLUMNS = ("key", "order_id", "date", "lot_name", "occurrences")
+CHUNK_ROWS = 50000
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl",
+               ".parquet": "parquet", ".txt": "txt"}
+_COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+_JSONL_ROW = '{"key": %s, "order_id": %s, "date": %s, "lot_name": %s, "occurrences": %d}\n'
+
+
+class ExportCancelled(Exception):
+    """Экспорт остановлен пользователем (недописанный файл удален)"""
+
+
+def detect_format(path):
+    """(формат, сжатие) по имени файла: keys.csv.gz -> ("csv", "gzip")"""
+    root, ext = os.path.splitext(path.lower())
+    compression = _COMPRESSIONS.get(ext)
+    if compression:
+        root, ext = os.path.splitext(root)
+    return _EXTENSIONS.get(ext, "txt"), compression
+
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    if compression == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("Для сжатия zstd установите пакет zstandard")
+        writer = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+        return io.TextIOWrapper(writer, encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _write_csv(stream, chunks):
+    writer = csv.writer(stream)
+    writer.writerow(COLUMNS)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield len(chunk)
+
+
+def _json_string(value):
+    return "null" if value is None else encode_basestring(str(value))
+
+
+def _write_jsonl(stream, chunks):
+    # Строка собирается по шаблону: в несколько раз быстрее json.dumps словаря на каждый ключ
+    for chunk in chunks:
+        stream.write("".join(_JSONL_ROW % (_json_string(key), _json_string(order_id), _json_string(date),
+                                           _json_string(lot_name), occurrences)
+                             for key, order_id, date, lot_name, occurrences in chunk))
+        yield len(chunk)
+
+
+def _write_txt(stream, chunks):
+    for chunk in chunks:
+        stream.write("".join(row[0] + "\n" for row in chunk))
+        yield len(chunk)
+
+
+def _write_parquet(path, chunks, compression):
+    if not HAS_PARQUET:
+        raise RuntimeError("Для экспорта в Parquet установите пакет pyarrow")
+    schema = pyarrow.schema([("key", pyarrow.string()), ("order_id", pyarrow.string()),
+                             ("date", pyarrow.string()), ("lot_name", pyarrow.string()),
+                             ("occurrences", pyarrow.int32())])
+    # Сжатие Parquet - внутри файла, по колонкам
+    writer = pyarrow.parquet.ParquetWriter(path, schema, compression=compression or "snappy")
+    try:
+        for chunk in chunks:
+            columns = [[str(value) if value is not None else None for value in column]
+                       for column in list(zip(*chunk))[:4]]
+            columns.append([row[4] for row in chunk])
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema))
+            yield len(chunk)
+    finally:
+        writer.close()
+
+
+def export_store(store, path, kind="all", fmt=None, compression=None, chunk_rows=CHUNK_ROWS,
+                 progress=None, should_stop=None):
+    """Экспорт строк store.export_rows(kind) в файл, возвращает число строк.
+
+    Формат и сжатие по умолчанию - по имени файла. progress(записано, всего) вызывается после
+    каждой пачки, should_stop() - остановка с ExportCancelled. Файл пишется во временный
+    и появляется под своим именем только целиком"""
+    detected_fmt, detected_compression = detect_format(path)
+    fmt = fmt or detected_fmt
+    compression = compression or detected_compression
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+
+    total = store.export_count(kind)
+    rows = store.export_rows(kind)
+    chunks = iter(lambda: list(islice(rows, chunk_rows)), [])
+    temp_path = path + ".part"
+    written = 0
+    try:
+        if fmt == "parquet":
+            batches = _write_parquet(temp_path, chunks, compression)
+            stream = None
+        else:
+            stream = _open_text(temp_path, compression)
+            batches = {"csv": _write_csv, "jsonl": _write_jsonl, "txt": _write_txt}[fmt](stream, chunks)
+        try:
+            for count in batches:
+                written += count
+                if progress:
+                    progress(written, total)
+                if should_stop and should_stop():
+                    raise ExportCancelled()
+        finally:
+            batches.close()
+            if stream:
+                stream.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
@@ -0,0 +1,368 @@
+"""
+Локальная замена FunPay для нагрузочных и длительных проверок анализа без сети и без реального аккаунта.
+
+Отдает главную страницу, список продаж и страницы заказов в той разметке, которую разбирают
+FunPayAPI.Account.get / get_sells / get_order. История генерируется детерминированно (seed)
+и на лету, поэтому 100 000 заказов не занимают памяти.
+
+Пример:
+    python funpay_standin.py --orders 100000 --latency lognormal:0.08:0.5 --rate-429 0.01 --port 8765
+    FUNPAY_GOLDEN_KEY=test python cli_main.py --funpay-url http://127.0.0.1:8765 --game-id 1 --lot "Lot A"
+"""
+import argparse
+import html as html_lib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+import FunPayAPI
+from FunPayAPI.common import exceptions
+
+from async_fetcher import FUNPAY_URL
+from lot_matcher import lot_list, split_lots
+
+SELLS_PAGE_LEN = 100  # Заказов на странице списка продаж, как на FunPay
+STATS_PATH = "/__standin__/stats"
+
+_FILLER_BLOCK = (
+    "<div class='chat-msg-item'><div class='chat-msg-author-link'>user</div>"
+    "<div class='chat-msg-text'>Сообщение в чате заказа &mdash; текст для объема страницы</div></div>\n"
+)
+
+
+def make_main_page(user_id=1, username="standin"):
+    """Главная страница для Account.get()"""
+    app_data = html_lib.escape(json.dumps({"userId": user_id, "csrf-token": "standin-token"}), quote=True)
+    return (f"<html><body data-app-data=\"{app_data}\">"
+            f"<div class=\"user-link-name\">{username}</div></body></html>")
+
+
+def make_order_page(order_id, keys=(), size=0, buyer="buyer", buyer_id=777, description="Lot A",
+                    price=100.0, status="Закрыт"):
+    """Страница заказа; size - примерный размер в байтах (добивается блоками чата)"""
+    secrets = "".join(f"<li><span class=\"secret-placeholder\">{html_lib.escape(key)}</span></li>" for key in keys)
+    secrets_block = (f"<div class=\"param-item\"><h5>Оплаченный товар</h5>"
+                     f"<ul class=\"order-secrets-list\">{secrets}</ul></div>") if keys else ""
+    status_class = "text-warning" if status == "Возврат" else "text-success"
+    head = (
+        "<html><head><title>Заказ</title></head><body>"
+        "<ul class=\"nav navbar-nav navbar-right logged\"><li class=\"active\"><a href=\"/orders/trade\">Продажи</a></li></ul>"
+        "<div class=\"user-link-name\">standin</div>"
+        f"<h1 class=\"page-header\">Заказ #{order_id} <span class=\"{status_class}\">{status}</span></h1>"
+        "<div class=\"param-item\"><h5>Игра</h5><div><a href=\"https://funpay.com/lots/1000/\">Stand-in Game</a></div></div>"
+        "<div class=\"param-item\"><h5>Категория</h5><div><a href=\"https://funpay.com/lots/1000/\">Ключи</a></div></div>"
+        f"<div class=\"param-item\"><h5>Краткое описание</h5><div>{html_lib.escape(description)}</div></div>"
+        f"<div class=\"param-item\"><h5>Количество</h5><div>{max(len(keys), 1)} шт.</div></div>"
+        f"<div class=\"param-item\"><h5>Сумма</h5><div><span>{price:.2f}</span> <span class=\"unit\">₽</span></div></div>"
+        f"{secrets_block}"
+        f"<div class=\"chat-header\"><div class=\"media-user-name\">"
+        f"<a href=\"https://funpay.com/users/{buyer_id}/\">{html_lib.escape(buyer)}</a></div></div>"
+        "<div class=\"order-review\"></div>"
+    )
+    tail = "</body></html>"
+    filler_count = max(0, (size - len(head) - len(tail)) // len(_FILLER_BLOCK.encode()))
+    return head + _FILLER_BLOCK * filler_count + tail
+
+
+def make_sells_item(order_id, description, price=100.0, buyer="buyer", buyer_id=777):
+    """Заказ в списке продаж (a.tc-item для Account.get_sells)"""
+    return (
+        f"<a href=\"https://funpay.com/orders/{order_id}/\" class=\"tc-item\">"
+        "<div class=\"tc-date\"><div class=\"tc-date-time\">сегодня, 12:30</div></div>"
+        f"<div class=\"tc-order\">#{order_id}</div>"
+        f"<div class=\"order-desc\"><div>{html_lib.escape(description)}</div>"
+        "<div class=\"text-muted\">Ключи</div></div>"
+        f"<div class=\"tc-user\"><div class=\"media-user-name\">"
+        f"<span data-href=\"https://funpay.com/users/{buyer_id}/\">{html_lib.escape(buyer)}</span></div></div>"
+        f"<div class=\"tc-price\">{price:.2f} ₽</div></a>"
+    )
+
+
+def make_sells_page(items, next_id=None):
+    """Страница списка продаж; next_id - курсор следующей страницы"""
+    cursor = f"<input type=\"hidden\" name=\"continue\" value=\"{next_id}\">" if next_id else ""
+    return (f"<html><body><div class=\"user-link-name\">standin</div><form>{cursor}</form>"
+            f"<div class=\"tc\">{''.join(items)}</div></body></html>")
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клиент закрыл соединение (отмена, завершение aiohttp-сессии) - это не ошибка сервера
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def parse_latency(spec):
+    """Распределение задержки ответа, секунды:
+    "0.05" - постоянная, "uniform:0.02:0.2", "exp:0.05" (среднее), "lognormal:0.08:0.5" (медиана, sigma)"""
+    if spec in (None, "", "0"):
+        return lambda rng: 0.0
+    kind, _, params = str(spec).partition(":")
+    try:
+        if not params:
+            value = float(kind)
+            return lambda rng: value
+        values = [float(v) for v in params.split(":")]
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "exp":
+            mean, = values
+            return lambda rng: rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(0, sigma) * median
+    except ValueError:
+        pass
+    raise ValueError(f"Неверное описание задержки: {spec}")
+
+
+class FunPayStandIn:
+    """HTTP-сервер в фоновом потоке, изображающий FunPay.
+
+    orders - размер истории продаж, match_rate - доля заказов нужного лота
+    (lot_name - лот или список лотов, подходящие заказы распределяются по ним по очереди),
+    duplicate_rate - доля ключей, повторяющих ранее проданный ключ,
+    latency - распределение задержки (см. parse_latency),
+    rate_429 / rate_5xx - доля запросов, на которые отвечается 429 (с Retry-After) или 500-503
+    """
+
+    def __init__(self, orders=1000, keys_per_order=1, match_rate=1.0, duplicate_rate=0.0, latency=None,
+                 rate_429=0.0, rate_5xx=0.0, retry_after=1, page_size=30000, lot_name="Lot A", seed=0):
+        self.orders = orders
+        self.keys_per_order = keys_per_order
+        self.match_rate = match_rate
+        self.duplicate_rate = duplicate_rate
+        self.latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.lots = lot_list(lot_name)
+        self.lot_name = self.lots[0]
+        self.seed = seed
+        self.stats = {'requests': 0, 'main': 0, 'sells': 0, 'orders': 0, 'errors_429': 0, 'errors_5xx': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @staticmethod
+    def order_id(index):
+        return f"S{index:07d}"
+
+    @staticmethod
+    def order_index(order_id):
+        return int(order_id[1:])
+
+    def is_matched(self, index):
+        # Подходящие заказы равномерно распределены по истории
+        return int((index + 1) * self.match_rate) > int(index * self.match_rate)
+
+    def description(self, index):
+        if not self.is_matched(index):
+            return "Other lot"
+        # Номер подходящего заказа по порядку - лоты чередуются при любой match_rate
+        return self.lots[int((index + 1) * self.match_rate) % len(self.lots)]
+
+    def order_keys(self, index):
+        """Ключи заказа; часть из них - повторы ключей более ранних заказов"""
+        rng = random.Random(self.seed * 1000003 + index)
+        keys = []
+        for j in range(self.keys_per_order):
+            if index > 0 and rng.random() < self.duplicate_rate:
+                source = rng.randrange(index)
+                keys.append(self.original_key(source, rng.randrange(self.keys_per_order)))
+            else:
+                keys.append(self.original_key(index, j))
+        return keys
+
+    @staticmethod
+    def original_key(index, j):
+        return f"KEY{index:07d}-{j:02d}-STANDIN"
+
+    def expected_keys(self, order_limit=None):
+        """(всего, уникальных) ключей, которые должен найти анализ лота lot_name"""
+        total = 0
+        unique = set()
+        matched = 0
+        for index in range(self.orders):
+            if not self.is_matched(index):
+                continue
+            if order_limit and matched >= order_limit:
+                break
+            matched += 1
+            # Как и extract_keys_from_html: повтор внутри одного заказа считается один раз
+            keys = list(dict.fromkeys(self.order_keys(index)))
+            total += len(keys)
+            unique.update(keys)
+        return total, len(unique)
+
+    def sells_page(self, start):
+        end = min(start + SELLS_PAGE_LEN, self.orders)
+        items = [make_sells_item(self.order_id(i), self.description(i)) for i in range(start, end)]
+        return make_sells_page(items, self.order_id(end) if end < self.orders else None)
+
+    def injected_error(self):
+        """Ответ с ошибкой для части запросов (статус, текст, заголовки) или None"""
+        with self._lock:
+            roll = self._rng.random()
+            if roll < self.rate_429:
+                self.stats['errors_429'] += 1
+                return 429, "Too Many Requests", {"Retry-After": str(self.retry_after)}
+            if roll < self.rate_429 + self.rate_5xx:
+                self.stats['errors_5xx'] += 1
+                return self._rng.choice((500, 502, 503)), "Server Error", {}
+        return None
+
+    def handle(self, method, path, body):
+        """(статус, HTML, заголовки) для запроса"""
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = self.latency(self._rng)
+        if delay > 0:
+            time.sleep(delay)
+        if path == STATS_PATH:
+            with self._lock:
+                return 200, json.dumps(self.stats), {"Content-Type": "application/json"}
+        if path == "/":
+            with self._lock:
+                self.stats['main'] += 1
+            return 200, make_main_page(), {"Set-Cookie": "PHPSESSID=standin; path=/"}
+        error = self.injected_error()
+        if error:
+            return error
+        if path == "/orders/trade":
+            with self._lock:
+                self.stats['sells'] += 1
+            cursor = parse_qs(body).get("continue", [None])[0]
+            start = self.order_index(cursor) if cursor else 0
+            return 200, self.sells_page(start), {}
+        if path.startswith("/orders/"):
+            order_id = path.strip("/").split("/")[-1]
+            try:
+                index = self.order_index(order_id)
+            except ValueError:
+                index = -1
+            if not 0 <= index < self.orders:
+                return 404, "Not found", {}
+            with self._lock:
+                self.stats['orders'] += 1
+            html = make_order_page(order_id, self.order_keys(index), self.page_size,
+                                   description=self.description(index))
+            return 200, html, {}
+        return 404, "Not found", {}
+
+    def start(self, host="127.0.0.1", port=0):
+        """Запуск сервера в фоновом потоке, возвращает базовый URL"""
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode() if length else ""
+                status, text, headers = standin.handle(self.command, urlsplit(self.path).path, body)
+                data = text.encode()
+                self.send_response(status)
+                headers.setdefault("Content-Type", "text/html; charset=utf-8")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = respond
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _StandInServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.base_url = self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class StandInAccount(FunPayAPI.Account):
+    """FunPayAPI.Account, который ходит на base_url вместо https://funpay.com"""
+
+    def __init__(self, base_url, golden_key="standin", **kwargs):
+        super().__init__(golden_key, **kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def method(self, request_method, api_method, headers, payload, exclude_phpsessid=False, raise_not_200=False):
+        if api_method.startswith(FUNPAY_URL):
+            api_method = api_method[len(FUNPAY_URL):]
+        link = self.base_url + "/" + api_method.lstrip("/")
+        headers["cookie"] = f"golden_key={self.golden_key}"
+        if self.phpsessid and not exclude_phpsessid:
+            headers["cookie"] += f"; PHPSESSID={self.phpsessid}"
+        if self.user_agent:
+            headers["user-agent"] = self.user_agent
+        response = getattr(requests, request_method)(link, headers=headers, data=payload,
+                                                     timeout=self.requests_timeout)
+        if response.status_code == 403:
+            raise exceptions.UnauthorizedError(response)
+        if response.status_code != 200 and raise_not_200:
+            raise exceptions.RequestFailedError(response)
+        return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальная замена FunPay для проверок анализа")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--orders", type=int, default=1000, help="заказов в истории продаж")
+    parser.add_argument("--keys-per-order", type=int, default=1)
+    parser.add_argument("--match-rate", type=float, default=1.0, help="доля заказов лота --lot")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="доля повторно проданных ключей")
+    parser.add_argument("--latency", default="0", help="задержка ответа: 0.05, uniform:A:B, exp:MEAN, lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="доля ответов 500/502/503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After для 429, сек")
+    parser.add_argument("--page-size", type=int, default=30000, help="размер страницы заказа, байт")
+    parser.add_argument("--lot", default="Lot A", help="название лота подходящих заказов (несколько - через ;)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    standin = FunPayStandIn(
+        orders=args.orders, keys_per_order=args.keys_per_order, match_rate=args.match_rate,
+        duplicate_rate=args.duplicate_rate, latency=args.latency, rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx, retry_after=args.retry_after, page_size=args.page_size,
+        lot_name=split_lots(args.lot), seed=args.seed
+    )
+    base_url = standin.start(args.host, args.port)
+    total, unique = standin.expected_keys()
+    print(f"FunPay stand-in: {base_url} (заказов: {args.orders}, ожидается ключей: {total}, уникальных: {unique})")
+    print(f"Статистика запросов: {base_url}{STATS_PATH}. Остановка - Ctrl+C")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        standin.stop()
+        print(json.dumps(standin.stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
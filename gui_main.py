@@ -2,8 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
 import configparser
+import multiprocessing
 import os
-import random
+import queue
 import re
 import sys
 import time
@@ -23,9 +24,22 @@ try:
     import FunPayAPI
     from FunPayAPI.common import exceptions
     from FunPayAPI.types import OrderStatuses as OrderState
+    from analysis_engine import (CACHE_FILE, CHECKPOINT_FILE, DEFAULT_USER_AGENT, EVENT_FINISHED, EVENT_KEYS,
+                                 EVENT_LOG, EVENT_PACING, EVENT_PROGRESS, KEY_INDEX_FILE, AnalysisEngine,
+                                 AnalysisSettings, create_account, dispatch_events, extract_keys_from_html)
 except ImportError:
     pass  # Обработаем в GUI
 
+from async_fetcher import HAS_AIOHTTP
+from checkpoint import AnalysisCheckpoint
+from exporters import export_store
+from key_index import KeyIndex
+from log_sink import DEFAULT_FILE_BACKUPS, DEFAULT_FILE_MAX_MB, DEFAULT_MAX_LINES, LogBuffer, RotatingLogWriter
+from lot_matcher import lot_list, split_lots
+from order_cache import OrderCache, DEFAULT_MAX_SIZE_MB
+from result_store import ResultStore
+from virtual_table import VirtualTreeview
+
 try:
     import customtkinter as ctk
     ctk.set_appearance_mode("dark")
@@ -35,6 +49,14 @@ except ImportError:
     MODERN_GUI = False
 
 CONFIG_FILE = "config.ini"
+EVENT_POLL_MS = 50            # Период разбора событий движка в главном потоке Tk
+MAX_EVENTS_PER_POLL = 500     # Не больше событий за один проход, чтобы окно не замирало
+RESULTS_REFRESH_MS = 100      # Новые ключи попадают в таблицу пачками, не чаще 10 раз в секунду
+LOG_FLUSH_MS = 100            # Сообщения лога выводятся пачками
+RESULTS_VIEW_KEYS = "Все ключи"
+RESULTS_VIEW_DUPLICATES = "Отчет по дубликатам"
+EVENT_EXPORT_PROGRESS = "export_progress"  # События фонового экспорта результатов
+EVENT_EXPORT_DONE = "export_done"
 
 class FunPayKeyChecker:
     def __init__(self):
@@ -52,10 +74,35 @@ class FunPayKeyChecker:
         self.account = None
         self.is_running = False
         self.is_paused = False
-        self.all_sold_keys = []
+        self.engine = None
+        self.all_sold_keys = ResultStore()
+        self.order_records = {}  # Записи о заказах последнего запуска (ID -> данные страницы заказа)
+        self.pending_result_rows = 0  # Новые ключи, еще не показанные в таблице
+        self.parser_backend = "auto"  # [Parsing] - без отдельных полей в окне
+        self.process_pool = False
+        self.log_buffer = LogBuffer(DEFAULT_MAX_LINES)  # Строки лога в окне (не больше max_lines)
+        self.log_writer = None  # Полный лог в файл [Log] file
+        self.log_file_settings = ("", DEFAULT_FILE_MAX_MB, DEFAULT_FILE_BACKUPS)
+        self.export_thread = None
+        self.duplicate_groups = []  # Отчет по дубликатам (строится при открытии)
+        
+        # События движка и фоновых потоков: виджеты Tk меняются только в главном потоке
+        self.events = queue.Queue()
+        self.event_handlers = {
+            EVENT_LOG: self.log_message,
+            EVENT_PROGRESS: self.show_progress,
+            EVENT_KEYS: self.append_result_rows,
+            EVENT_PACING: self.show_pacing,
+            EVENT_FINISHED: self.analysis_finished,
+            EVENT_EXPORT_PROGRESS: self.show_export_progress,
+            EVENT_EXPORT_DONE: self.export_finished,
+        }
         
         self.setup_gui()
         self.load_config()
+        self.root.after(EVENT_POLL_MS, self.process_events)
+        self.root.after(RESULTS_REFRESH_MS, self.flush_result_rows)
+        self.root.after(LOG_FLUSH_MS, self.flush_log)
     
     def setup_icon(self):
         """Настройка иконки для окна программы"""
@@ -225,6 +272,55 @@ class FunPayKeyChecker:
             
             ctk.CTkLabel(pages_frame, text="(1 страница ≈ 100 заказов)").pack(side="left", padx=10)
             
+            # Параллельная загрузка заказов
+            workers_frame = ctk.CTkFrame(safety_frame)
+            workers_frame.pack(fill="x", padx=20, pady=10)
+            
+            ctk.CTkLabel(workers_frame, text="Потоков загрузки заказов:").pack(side="left", padx=10)
+            self.workers_var = tk.StringVar(value="4")
+            self.workers_entry = ctk.CTkEntry(workers_frame, textvariable=self.workers_var, width=100)
+            self.workers_entry.pack(side="left", padx=10)
+            
+            ctk.CTkLabel(workers_frame, text="(общий темп запросов задают задержки)").pack(side="left", padx=10)
+            
+            self.async_http_var = tk.BooleanVar(value=HAS_AIOHTTP)
+            ctk.CTkCheckBox(workers_frame, text="Асинхронно (aiohttp)",
+                            variable=self.async_http_var).pack(side="left", padx=10)
+            
+            ctk.CTkLabel(workers_frame, text="Попыток на запрос:").pack(side="left", padx=10)
+            self.max_retries_var = tk.StringVar(value="4")
+            self.max_retries_entry = ctk.CTkEntry(workers_frame, textvariable=self.max_retries_var, width=60)
+            self.max_retries_entry.pack(side="left", padx=10)
+            
+            # Кэш заказов
+            cache_frame = ctk.CTkFrame(safety_frame)
+            cache_frame.pack(fill="x", padx=20, pady=10)
+            
+            self.cache_enabled_var = tk.BooleanVar(value=True)
+            ctk.CTkCheckBox(cache_frame, text="Кэшировать закрытые заказы на диске",
+                            variable=self.cache_enabled_var).pack(side="left", padx=10)
+            
+            ctk.CTkLabel(cache_frame, text="Размер кэша (МБ):").pack(side="left", padx=10)
+            self.cache_size_var = tk.StringVar(value=str(DEFAULT_MAX_SIZE_MB))
+            self.cache_size_entry = ctk.CTkEntry(cache_frame, textvariable=self.cache_size_var, width=100)
+            self.cache_size_entry.pack(side="left", padx=10)
+            
+            self.clear_cache_btn = ctk.CTkButton(cache_frame, text="🗑️ Очистить кэш", width=140,
+                                                 command=self.clear_order_cache)
+            self.clear_cache_btn.pack(side="left", padx=10)
+            
+            # История ключей между запусками
+            history_frame = ctk.CTkFrame(safety_frame)
+            history_frame.pack(fill="x", padx=20, pady=10)
+            
+            self.history_enabled_var = tk.BooleanVar(value=True)
+            ctk.CTkCheckBox(history_frame, text="Искать ключи, проданные ранее в других заказах",
+                            variable=self.history_enabled_var).pack(side="left", padx=10)
+            
+            self.clear_history_btn = ctk.CTkButton(history_frame, text="🗑️ Очистить историю", width=160,
+                                                   command=self.clear_key_history)
+            self.clear_history_btn.pack(side="left", padx=10)
+            
             # Кнопки
             buttons_frame = ctk.CTkFrame(self.tab_settings)
             buttons_frame.pack(fill="x", padx=20, pady=20)
@@ -256,9 +352,10 @@ class FunPayKeyChecker:
             self.game_id_entry.pack(padx=20, pady=(0,10))
             
             # Название лота
-            ctk.CTkLabel(input_frame, text="Название лота:", 
+            ctk.CTkLabel(input_frame, text="Название лота (несколько - через ;):", 
                         font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=20, pady=(10,5))
-            self.lot_name_entry = ctk.CTkEntry(input_frame, width=600, placeholder_text="Точное название лота")
+            self.lot_name_entry = ctk.CTkEntry(input_frame, width=600,
+                                               placeholder_text="Точное название лота; Другой лот; ...")
             self.lot_name_entry.pack(padx=20, pady=(0,20))
             
             # Прогресс
@@ -272,6 +369,9 @@ class FunPayKeyChecker:
             self.progress_bar.pack(pady=10)
             self.progress_bar.set(0)
             
+            self.rate_label = ctk.CTkLabel(progress_frame, text="Темп запросов: —")
+            self.rate_label.pack(pady=(0, 10))
+            
             # Лог
             self.log_text = ctk.CTkTextbox(progress_frame, height=250, width=700)
             self.log_text.pack(pady=10, fill="both", expand=True)
@@ -293,6 +393,10 @@ class FunPayKeyChecker:
                                          command=self.pause_analysis, state="disabled")
             self.pause_btn.pack(side="left", padx=10)
             
+            self.resume_btn = ctk.CTkButton(control_frame, text="⏯️ Продолжить прерванный",
+                                          command=self.resume_analysis)
+            self.resume_btn.pack(side="left", padx=10)
+            
             self.clear_log_btn = ctk.CTkButton(control_frame, text="🗑️ Очистить лог", 
                                              command=self.clear_log)
             self.clear_log_btn.pack(side="right", padx=10)
@@ -313,31 +417,51 @@ class FunPayKeyChecker:
                                           font=ctk.CTkFont(size=14))
             self.stats_label.pack(pady=20)
             
-            # Таблица ключей (используем Treeview)
+            # Переключатель: все ключи или отчет по дубликатам
+            self.results_view_var = tk.StringVar(value=RESULTS_VIEW_KEYS)
+            self.results_view_switch = ctk.CTkSegmentedButton(self.tab_results,
+                                                              values=[RESULTS_VIEW_KEYS, RESULTS_VIEW_DUPLICATES],
+                                                              variable=self.results_view_var,
+                                                              command=self.switch_results_view)
+            self.results_view_switch.pack(padx=20, anchor="w")
+            
+            # Таблица ключей: виртуальный Treeview, строки берутся из хранилища при прокрутке
             table_frame = ctk.CTkFrame(self.tab_results)
             table_frame.pack(fill="both", expand=True, padx=20, pady=10)
             
-            # Создаем Treeview для таблицы
-            columns = ("№", "Ключ", "Заказ", "Дата")
-            self.keys_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15)
+            columns = ("№", "Ключ", "Заказ", "Дата", "Лот", "Ранее")
+            self.keys_tree = VirtualTreeview(table_frame, columns, lambda: len(self.all_sold_keys),
+                                             self.result_row, height=15)
             
             # Настройка колонок
             self.keys_tree.heading("№", text="№")
             self.keys_tree.heading("Ключ", text="Ключ")
             self.keys_tree.heading("Заказ", text="ID Заказа")
             self.keys_tree.heading("Дата", text="Дата")
+            self.keys_tree.heading("Лот", text="Лот")
+            self.keys_tree.heading("Ранее", text="Ранее продан")
             
             self.keys_tree.column("№", width=50)
             self.keys_tree.column("Ключ", width=300)
             self.keys_tree.column("Заказ", width=150)
             self.keys_tree.column("Дата", width=150)
-            
-            # Скроллбар для таблицы
-            scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.keys_tree.yview)
-            self.keys_tree.configure(yscrollcommand=scrollbar.set)
-            
-            self.keys_tree.pack(side="left", fill="both", expand=True)
-            scrollbar.pack(side="right", fill="y")
+            self.keys_tree.column("Лот", width=150)
+            self.keys_tree.column("Ранее", width=250)
+            # Ключи, которые уже продавались в других заказах
+            self.keys_tree.tag_configure("seen", foreground="#ff8c00")
+            
+            self.keys_tree.pack()
+            
+            # Отчет по дубликатам: группа на ключ со всеми заказами, самые тяжелые первыми
+            report_columns = ("№", "Ключ", "Продаж", "Заказов", "Заказы", "Даты")
+            self.report_tree = VirtualTreeview(table_frame, report_columns, lambda: len(self.duplicate_groups),
+                                               self.report_row, height=15)
+            self.report_tree.follow_tail = False
+            for column, text, width in (("№", "№", 50), ("Ключ", "Ключ", 250), ("Продаж", "Продаж", 70),
+                                        ("Заказов", "Заказов", 70), ("Заказы", "ID Заказов", 300),
+                                        ("Даты", "Даты", 300)):
+                self.report_tree.heading(column, text=text)
+                self.report_tree.column(column, width=width)
             
             # Кнопки экспорта
             export_frame = ctk.CTkFrame(self.tab_results)
@@ -354,20 +478,70 @@ class FunPayKeyChecker:
             self.export_duplicates_btn = ctk.CTkButton(export_frame, text="👥 Экспорт дубликатов", 
                                                      command=self.export_duplicates)
             self.export_duplicates_btn.pack(side="left", padx=10)
+            
+            self.export_report_btn = ctk.CTkButton(export_frame, text="📋 Экспорт отчета по дубликатам",
+                                                   command=self.export_duplicate_report)
+            self.export_report_btn.pack(side="left", padx=10)
+            
+            self.export_status_label = ctk.CTkLabel(export_frame, text="")
+            self.export_status_label.pack(side="left", padx=10)
     
-    def log_message(self, message):
-        """Добавление сообщения в лог"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
-        
+    def log_message(self, message, created=None):
+        """Добавление сообщения в лог (только из главного потока)"""
+        moment = datetime.fromtimestamp(created) if created else datetime.now()
+        timestamp = moment.strftime("%H:%M:%S")
+        self.log_buffer.append(f"[{timestamp}] {message}\n")
+        if self.log_writer:
+            self.log_writer.write(message, created)
+    
+    def flush_log(self):
+        """Вывод накопившихся сообщений одной вставкой; старые строки сверх max_lines удаляются"""
+        try:
+            update = self.log_buffer.flush()
+            if update and MODERN_GUI:
+                excess, text = update
+                if excess is None:
+                    self.log_text.delete("1.0", "end")
+                elif excess:
+                    self.log_text.delete("1.0", f"{excess + 1}.0")
+                self.log_text.insert("end", text)
+                self.log_text.see("end")
+        finally:
+            self.root.after(LOG_FLUSH_MS, self.flush_log)
+    
+    def configure_log(self, max_lines, log_file, file_max_mb, file_backups):
+        """Применение настроек [Log]: размер лога в окне и файл полного лога"""
+        old_buffer = self.log_buffer
+        self.log_buffer = LogBuffer(max_lines)
+        for line in old_buffer.lines:
+            self.log_buffer.append(line)
         if MODERN_GUI:
-            self.log_text.insert("end", formatted_message)
-            self.log_text.see("end")
+            self.log_text.delete("1.0", "end")
         
-        self.root.update_idletasks()
+        self.log_file_settings = (log_file, file_max_mb, file_backups)
+        if self.log_writer:
+            self.log_writer.close()
+            self.log_writer = None
+        if log_file:
+            try:
+                self.log_writer = RotatingLogWriter(log_file, file_max_mb, file_backups)
+            except OSError as e:
+                self.log_message(f"⚠️ Не удалось открыть файл лога {log_file}: {e}")
+    
+    def post_log(self, message):
+        """Сообщение в лог из фонового потока (через очередь событий)"""
+        self.events.put((EVENT_LOG, (message, time.time())))
+    
+    def process_events(self):
+        """Разбор очереди событий в главном потоке Tk"""
+        try:
+            dispatch_events(self.events, self.event_handlers, MAX_EVENTS_PER_POLL)
+        finally:
+            self.root.after(EVENT_POLL_MS, self.process_events)
     
     def clear_log(self):
         """Очистка лога"""
+        self.log_buffer.clear()
         if MODERN_GUI:
             self.log_text.delete("1.0", "end")
     
@@ -385,7 +559,7 @@ class FunPayKeyChecker:
                         self.golden_key_entry.insert(0, golden_key)
                     
                     # Загружаем User Agent
-                    user_agent = config.get("FunPay", "user_agent", fallback="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+                    user_agent = config.get("FunPay", "user_agent", fallback=DEFAULT_USER_AGENT)
                     self.user_agent_entry.insert(0, user_agent)
                     
                     # Загружаем настройки безопасности
@@ -393,13 +567,25 @@ class FunPayKeyChecker:
                     self.max_delay_var.set(config.get("Safety", "max_delay_sec", fallback="5"))
                     self.order_limit_var.set(config.get("Safety", "order_limit", fallback="0"))
                     self.page_limit_var.set(config.get("Safety", "page_limit", fallback="0"))
+                    self.workers_var.set(config.get("Safety", "workers", fallback="4"))
+                    self.max_retries_var.set(config.get("Safety", "max_retries", fallback="4"))
+                    self.async_http_var.set(config.getboolean("Safety", "async_http", fallback=HAS_AIOHTTP))
+                    self.cache_enabled_var.set(config.getboolean("Cache", "enabled", fallback=True))
+                    self.cache_size_var.set(config.get("Cache", "max_size_mb", fallback=str(DEFAULT_MAX_SIZE_MB)))
+                    self.parser_backend = config.get("Parsing", "backend", fallback="auto")
+                    self.process_pool = config.getboolean("Parsing", "process_pool", fallback=False)
+                    self.history_enabled_var.set(config.getboolean("History", "enabled", fallback=True))
+                    self.configure_log(config.getint("Log", "max_lines", fallback=DEFAULT_MAX_LINES),
+                                       config.get("Log", "file", fallback=""),
+                                       config.getfloat("Log", "file_max_mb", fallback=DEFAULT_FILE_MAX_MB),
+                                       config.getint("Log", "file_backups", fallback=DEFAULT_FILE_BACKUPS))
                     
             except Exception as e:
                 self.log_message(f"Ошибка при загрузке конфигурации: {e}")
         else:
             # Устанавливаем значения по умолчанию
             if MODERN_GUI:
-                self.user_agent_entry.insert(0, "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+                self.user_agent_entry.insert(0, DEFAULT_USER_AGENT)
     
     def save_config(self):
         """Сохранение конфигурации"""
@@ -414,7 +600,28 @@ class FunPayKeyChecker:
                 "min_delay_sec": self.min_delay_var.get(),
                 "max_delay_sec": self.max_delay_var.get(),
                 "order_limit": self.order_limit_var.get(),
-                "page_limit": self.page_limit_var.get()
+                "page_limit": self.page_limit_var.get(),
+                "workers": self.workers_var.get(),
+                "max_retries": self.max_retries_var.get(),
+                "async_http": str(self.async_http_var.get())
+            }
+            config["Cache"] = {
+                "enabled": str(self.cache_enabled_var.get()),
+                "max_size_mb": self.cache_size_var.get()
+            }
+            config["Parsing"] = {
+                "backend": self.parser_backend,
+                "process_pool": str(self.process_pool)
+            }
+            config["History"] = {
+                "enabled": str(self.history_enabled_var.get())
+            }
+            log_file, file_max_mb, file_backups = self.log_file_settings
+            config["Log"] = {
+                "max_lines": str(self.log_buffer.max_lines),
+                "file": log_file,
+                "file_max_mb": str(file_max_mb),
+                "file_backups": str(file_backups)
             }
         
         try:
@@ -424,45 +631,65 @@ class FunPayKeyChecker:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось сохранить настройки: {e}")
     
+    def clear_order_cache(self):
+        """Очистка кэша заказов"""
+        if self.is_running:
+            messagebox.showwarning("Предупреждение", "Нельзя очищать кэш во время анализа!")
+            return
+        try:
+            cache = OrderCache(CACHE_FILE)
+            count, size = cache.stats()
+            cache.clear()
+            cache.close()
+            self.log_message(f"🗑️ Кэш очищен: удалено заказов {count} ({size / 1024 / 1024:.1f} МБ)")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось очистить кэш: {e}")
+    
+    def clear_key_history(self):
+        """Очистка истории ключей прошлых запусков"""
+        if self.is_running:
+            messagebox.showwarning("Предупреждение", "Нельзя очищать историю во время анализа!")
+            return
+        if not messagebox.askyesno("Подтверждение", "Удалить историю всех ранее найденных ключей?"):
+            return
+        try:
+            key_index = KeyIndex(KEY_INDEX_FILE)
+            count, unique = key_index.stats()
+            key_index.clear()
+            key_index.close()
+            self.log_message(f"🗑️ История очищена: удалено записей {count} (ключей {unique})")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось очистить историю: {e}")
+    
     def test_connection(self):
         """Тест подключения к FunPay"""
         def test_thread():
             try:
-                self.log_message("Тестирование подключения...")
+                self.post_log("Тестирование подключения...")
                 
                 if MODERN_GUI:
                     golden_key = self.golden_key_entry.get().strip()
                     user_agent = self.user_agent_entry.get().strip()
                 
                 if not golden_key or "ВАШ_GOLDEN_KEY_СЮДА" in golden_key:
-                    self.log_message("❌ Ошибка: Укажите корректный Golden Key")
+                    self.post_log("❌ Ошибка: Укажите корректный Golden Key")
                     return
                 
-                # Очищаем User-Agent от недопустимых символов
-                user_agent_clean = user_agent.encode('ascii', 'ignore').decode('ascii')
-                if not user_agent_clean:
-                    user_agent_clean = (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    )
-
-                self.log_message(f"🔑 Используется Golden Key: {golden_key[:10]}...")
-                self.log_message(f"🌐 User Agent: {user_agent_clean[:50]}...")
+                self.post_log(f"🔑 Используется Golden Key: {golden_key[:10]}...")
                 
-                account = FunPayAPI.Account(golden_key=golden_key, user_agent=user_agent_clean)
-                account.get()
+                account = create_account(golden_key, user_agent)
+                self.post_log(f"🌐 User Agent: {account.user_agent[:50]}...")
                 
-                self.log_message(f"✅ Подключение успешно! Пользователь: {account.username} (ID: {account.id})")
+                self.post_log(f"✅ Подключение успешно! Пользователь: {account.username} (ID: {account.id})")
                 self.account = account
                 
             except exceptions.UnauthorizedError:
-                self.log_message("❌ Ошибка: Неверный Golden Key или проблемы с авторизацией")
+                self.post_log("❌ Ошибка: Неверный Golden Key или проблемы с авторизацией")
             except UnicodeEncodeError as e:
-                self.log_message(f"❌ Ошибка кодировки User-Agent: {e}")
-                self.log_message("💡 Попробуйте использовать стандартный User-Agent без специальных символов")
+                self.post_log(f"❌ Ошибка кодировки User-Agent: {e}")
+                self.post_log("💡 Попробуйте использовать стандартный User-Agent без специальных символов")
             except Exception as e:
-                self.log_message(f"❌ Ошибка подключения: {e}")
+                self.post_log(f"❌ Ошибка подключения: {e}")
         
         threading.Thread(target=test_thread, daemon=True).start()
     
@@ -471,9 +698,13 @@ class FunPayKeyChecker:
         if not self.account:
             messagebox.showwarning("Предупреждение", "Сначала протестируйте подключение!")
             return
+        if self.export_thread and self.export_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Дождитесь завершения экспорта!")
+            return
         
         game_id = self.game_id_entry.get().strip()
-        lot_name = self.lot_name_entry.get().strip()
+        # Все лоты ищутся за один проход по истории продаж
+        lot_name = split_lots(self.lot_name_entry.get())
         
         if not game_id or not lot_name:
             messagebox.showwarning("Предупреждение", "Заполните все поля!")
@@ -485,373 +716,275 @@ class FunPayKeyChecker:
             messagebox.showerror("Ошибка", "ID игры должен быть числом!")
             return
         
+        if os.path.exists(CHECKPOINT_FILE) and not messagebox.askyesno(
+                "Подтверждение", "Есть незавершенный анализ. Начать новый и удалить сохраненный прогресс?"):
+            return
+        
+        self.launch_analysis(game_id, lot_name)
+    
+    def resume_analysis(self):
+        """Продолжение анализа с последней контрольной точки"""
+        if not self.account:
+            messagebox.showwarning("Предупреждение", "Сначала протестируйте подключение!")
+            return
+        
+        checkpoint = AnalysisCheckpoint.load(CHECKPOINT_FILE)
+        if not checkpoint:
+            messagebox.showinfo("Информация", "Нет сохраненного прогресса для продолжения")
+            return
+        
+        self.game_id_entry.delete(0, "end")
+        self.game_id_entry.insert(0, str(checkpoint.game_id))
+        self.lot_name_entry.delete(0, "end")
+        self.lot_name_entry.insert(0, "; ".join(lot_list(checkpoint.lot_name)))
+        
+        self.launch_analysis(checkpoint.game_id, checkpoint.lot_name, checkpoint)
+    
+    def get_analysis_settings(self):
+        """Настройки анализа из полей вкладки настроек"""
+        return AnalysisSettings(
+            min_delay=self.min_delay_var.get(),
+            max_delay=self.max_delay_var.get(),
+            order_limit=self.order_limit_var.get(),
+            page_limit=self.page_limit_var.get(),
+            workers=self.workers_var.get(),
+            max_retries=self.max_retries_var.get(),
+            async_http=self.async_http_var.get(),
+            cache_enabled=self.cache_enabled_var.get(),
+            cache_size_mb=self.cache_size_var.get(),
+            parser_backend=self.parser_backend,
+            process_pool=self.process_pool,
+            history_enabled=self.history_enabled_var.get()
+        )
+    
+    def launch_analysis(self, game_id, lot_name, checkpoint=None):
+        """Запуск потока анализа (новый запуск или продолжение)"""
+        try:
+            settings = self.get_analysis_settings()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Некорректные настройки: {e}")
+            return
+        
+        self.engine = AnalysisEngine(self.account, settings, events=self.events)
+        self.all_sold_keys = self.engine.all_sold_keys
+        self.order_records = self.engine.order_records
+        
         self.is_running = True
         self.is_paused = False
         self.start_btn.configure(state="disabled")
+        self.resume_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.pause_btn.configure(state="normal")
-        self.all_sold_keys = []
         
-        # Очищаем таблицу результатов
-        for item in self.keys_tree.get_children():
-            self.keys_tree.delete(item)
+        # Таблица теперь показывает хранилище нового запуска
+        # (ключи контрольной точки движок загрузит в него сам)
+        self.keys_tree.follow_tail = True
+        self.duplicate_groups = []
+        self.report_tree.refresh()
+        self.update_results()
         
-        def analysis_thread():
-            try:
-                self.run_analysis(game_id, lot_name)
-            except Exception as e:
-                self.log_message(f"❌ Критическая ошибка: {e}")
-            finally:
-                self.is_running = False
-                self.is_paused = False
-                self.start_btn.configure(state="normal")
-                self.stop_btn.configure(state="disabled")
-                self.pause_btn.configure(state="disabled")
-                self.progress_bar.set(0)
-        
-        threading.Thread(target=analysis_thread, daemon=True).start()
+        # Итог придет событием EVENT_FINISHED (см. analysis_finished)
+        threading.Thread(target=self.engine.run, args=(game_id, lot_name, checkpoint), daemon=True).start()
+    
+    def analysis_finished(self, summary):
+        """Завершение запуска движка"""
+        if summary.get('total_keys') is not None:
+            self.update_results()
+            if self.results_view_var.get() == RESULTS_VIEW_DUPLICATES:
+                self.show_duplicate_report()
+        self.is_running = False
+        self.is_paused = False
+        self.start_btn.configure(state="normal")
+        self.resume_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+        self.pause_btn.configure(state="disabled", text="⏸️ Пауза")
+        self.progress_bar.set(0)
     
     def stop_analysis(self):
         """Остановка анализа"""
         self.is_running = False
         self.is_paused = False
+        self.engine.stop()
         self.log_message("🛑 Анализ остановлен пользователем")
     
     def pause_analysis(self):
         """Пауза/возобновление анализа"""
         if self.is_paused:
             self.is_paused = False
+            self.engine.resume()
             self.pause_btn.configure(text="⏸️ Пауза")
             self.log_message("▶️ Анализ возобновлен")
         else:
             self.is_paused = True
+            self.engine.pause()
             self.pause_btn.configure(text="▶️ Продолжить")
             self.log_message("⏸️ Анализ приостановлен")
     
-    def run_analysis(self, game_id, lot_name):
-        """Основная логика анализа"""
-        try:
-            # Проверяем, что аккаунт инициализирован
-            if not self.account:
-                self.log_message("❌ Ошибка: Аккаунт не инициализирован. Сначала протестируйте подключение!")
-                return
-            
-            # Получение настроек
-            min_delay = float(self.min_delay_var.get())
-            max_delay = float(self.max_delay_var.get())
-            order_limit = int(self.order_limit_var.get()) if self.order_limit_var.get() != "0" else None
-            page_limit = int(self.page_limit_var.get()) if self.page_limit_var.get() != "0" else None
-            
-            self.log_message(f"🔍 Начинаю поиск заказов для игры ID: {game_id}")
-            self.log_message(f"📦 Лот: {lot_name}")
-            if page_limit:
-                self.log_message(f"📄 Лимит страниц: {page_limit} (≈ {page_limit * 100} заказов)")
-            if order_limit:
-                self.log_message(f"🔢 Лимит заказов для анализа: {order_limit}")
-            
-            # Сбор заказов
-            all_orders = []
-            start_from = None
-            page_num = 1
-            
-            while self.is_running:
-                # Проверка паузы
-                while self.is_paused and self.is_running:
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    break
-                self.log_message(f"📄 Загружаю страницу {page_num}...")
-                
-                try:
-                    next_start_from, orders_batch = self.account.get_sells(
-                        start_from=start_from,
-                        game=game_id,
-                        state="closed",
-                        include_paid=False,
-                        include_refunded=False
-                    )
-                    
-                    if not orders_batch:
-                        self.log_message("ℹ️ Больше заказов не найдено")
-                        break
-                    
-                    all_orders.extend(orders_batch)
-                    self.log_message(f"✅ Загружено {len(orders_batch)} заказов (всего: {len(all_orders)})")
-                    
-                    if not next_start_from:
-                        self.log_message("ℹ️ Достигнут конец списка заказов")
-                        break
-                    
-                    # Проверяем лимит страниц
-                    if page_limit and page_num >= page_limit:
-                        self.log_message(f"⚠️ Достигнут лимит страниц: {page_limit}")
-                        break
-                    
-                    start_from = next_start_from
-                    page_num += 1
-                    
-                    # Задержка с отображением
-                    delay = random.uniform(min_delay, max_delay)
-                    self.log_message(f"⏳ Задержка {delay:.1f} сек...")
-                    time.sleep(delay)
-                    
-                except exceptions.RequestFailedError as e:
-                    self.log_message(f"❌ Ошибка запроса на странице {page_num}: {e}")
-                    self.log_message("⏳ Увеличиваю задержку и повторяю...")
-                    time.sleep(min_delay * 2)
-                    continue
-                    
-                except Exception as e:
-                    self.log_message(f"❌ Неожиданная ошибка на странице {page_num}: {e}")
-                    break
-            
-            if not self.is_running:
-                return
-            
-            # Фильтрация по названию лота
-            self.log_message(f"🔎 Фильтрую заказы по названию лота...")
-            target_orders = []
-            
-            for order in all_orders:
-                if not self.is_running:
-                    return
-                
-                description = getattr(order, 'description', '')
-                if lot_name in description:
-                    target_orders.append(order)
-                    
-                    if order_limit and len(target_orders) >= order_limit:
-                        self.log_message(f"⚠️ Достигнут лимит заказов: {order_limit}")
-                        break
-            
-            if not target_orders:
-                self.log_message("❌ Заказы с указанным названием лота не найдены")
-                return
-            
-            self.log_message(f"✅ Найдено {len(target_orders)} подходящих заказов")
-            
-            # Анализ заказов
-            processed = 0
-            for order_header in target_orders:
-                # Проверка паузы
-                while self.is_paused and self.is_running:
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    return
-                
-                processed += 1
-                progress = processed / len(target_orders)
-                self.progress_bar.set(progress)
-                self.progress_label.configure(text=f"Обработка заказа {processed}/{len(target_orders)}")
-                
-                self.log_message(f"🔍 Анализ заказа {order_header.id} ({processed}/{len(target_orders)})")
-                
-                try:
-                    # Задержка перед запросом
-                    delay = random.uniform(min_delay, max_delay)
-                    time.sleep(delay)
-                    
-                    full_order = self.account.get_order(order_header.id)
-                    if full_order and hasattr(full_order, 'html') and full_order.html:
-                        keys = self.extract_keys_from_html(full_order.html)
-                        
-                        if keys:
-                            self.log_message(f"✅ Найдено ключей: {len(keys)}")
-                            for key in keys:
-                                self.all_sold_keys.append({
-                                    'key': key,
-                                    'order_id': order_header.id,
-                                    'date': getattr(order_header, 'created_at', 'Неизвестно')
-                                })
-                        else:
-                            self.log_message("⚠️ Ключи не найдены в заказе")
-                    else:
-                        self.log_message("⚠️ Не удалось получить содержимое заказа")
-                    
-                except exceptions.RequestFailedError as e:
-                    self.log_message(f"❌ Ошибка запроса заказа {order_header.id}: {e}")
-                    # Увеличиваем задержку при ошибке
-                    time.sleep(min_delay * 2)
-                    
-                except exceptions.UnauthorizedError:
-                    self.log_message("❌ Ошибка авторизации. Проверьте Golden Key")
-                    break
-                    
-                except Exception as e:
-                    self.log_message(f"❌ Неожиданная ошибка при обработке заказа {order_header.id}: {e}")
-            
-            # Обновление результатов
-            self.update_results()
-            
-            # Финальная статистика
-            total_keys = len(self.all_sold_keys)
-            unique_keys = len(set(k['key'] for k in self.all_sold_keys))
-            duplicates = total_keys - unique_keys
-            
-            self.log_message(f"🎉 Анализ завершен!")
-            self.log_message(f"📊 Всего ключей: {total_keys}")
-            self.log_message(f"🔑 Уникальных: {unique_keys}")
-            self.log_message(f"👥 Дубликатов: {duplicates}")
-            self.log_message(f"📄 Обработано страниц: {page_num - 1}")
-            self.log_message(f"📦 Найдено подходящих заказов: {len(target_orders)}")
-            
-        except Exception as e:
-            self.log_message(f"❌ Критическая ошибка: {e}")
+    def show_progress(self, processed, matched):
+        """Отображение прогресса обработки заказов"""
+        self.progress_bar.set(processed / max(matched, 1))
+        self.progress_label.configure(text=f"Обработано заказов: {processed} из найденных {matched}")
+    
+    def show_pacing(self, rate, interval, min_rate, max_rate):
+        """Отображение текущего темпа запросов"""
+        self.rate_label.configure(
+            text=f"Темп запросов: {rate:.2f} запр/сек (интервал {interval:.2f} сек, "
+                 f"диапазон {min_rate:.2f}–{max_rate:.2f})"
+        )
     
     def extract_keys_from_html(self, html):
         """Извлечение ключей из HTML"""
+        return extract_keys_from_html(html)
+    
+    def result_row(self, index):
+        """(значения, теги) строки таблицы; ключи, проданные ранее в других заказах, выделяются"""
+        key_data = self.all_sold_keys[index]
+        sale = key_data.get('seen_before')
+        earlier = f"#{sale['order_id']} ({sale['lot_name']}, {sale['date']})" if sale else ""
+        values = (index + 1, key_data['key'], key_data['order_id'], key_data['date'], key_data.get('lot_name', ""),
+                  earlier)
+        return values, ("seen",) if sale else ()
+    
+    def report_row(self, index):
+        """(значения, теги) строки отчета по дубликатам"""
+        group = self.duplicate_groups[index]
+        values = (index + 1, group.key, group.count, group.orders, ", ".join(map(str, group.order_ids)),
+                  ", ".join(map(str, group.dates)))
+        return values, ()
+    
+    def switch_results_view(self, view):
+        """Переключение таблицы: все ключи или отчет по дубликатам"""
+        if view == RESULTS_VIEW_DUPLICATES:
+            self.keys_tree.pack_forget()
+            self.report_tree.pack()
+            self.show_duplicate_report()
+        else:
+            self.report_tree.pack_forget()
+            self.keys_tree.pack()
+            self.keys_tree.refresh()
+    
+    def show_duplicate_report(self):
+        """Построение отчета по текущим результатам (во время анализа - снимок на момент открытия)"""
+        started = time.perf_counter()
+        self.duplicate_groups = self.all_sold_keys.duplicate_report()
+        self.report_tree.moveto(0)
+        self.log_message(f"👥 Отчет по дубликатам: ключей {len(self.duplicate_groups)} "
+                         f"({time.perf_counter() - started:.2f} сек)")
+    
+    def append_result_rows(self, rows):
+        """Новые ключи по ходу анализа: они уже в хранилище, таблица обновится в flush_result_rows"""
+        self.pending_result_rows += len(rows)
+    
+    def flush_result_rows(self):
+        """Показ накопившихся ключей одним обновлением таблицы и статистики"""
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            keys = []
-            
-            # Основной способ - поиск по классу secret-placeholder
-            secret_elements = soup.find_all('span', class_='secret-placeholder')
-            for element in secret_elements:
-                key = element.get_text().strip()
-                if key and len(key) > 5:  # Уменьшили минимальную длину
-                    keys.append(key)
-            
-            # Дополнительный поиск - по другим возможным классам
-            if not keys:
-                # Поиск по другим классам, которые могут содержать ключи
-                other_selectors = [
-                    'span.secret',
-                    'div.secret-placeholder',
-                    'code',
-                    'pre',
-                    'span[style*="font-family: monospace"]'
-                ]
-                
-                for selector in other_selectors:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        key = element.get_text().strip()
-                        if key and len(key) > 5 and len(key) < 200:  # Разумные ограничения
-                            keys.append(key)
-            
-            # Удаляем дубликаты, сохраняя порядок
-            seen = set()
-            unique_keys = []
-            for key in keys:
-                if key not in seen:
-                    seen.add(key)
-                    unique_keys.append(key)
-            
-            return unique_keys
-            
-        except Exception as e:
-            print(f"Ошибка извлечения ключей: {e}")
-            return []
+            if self.pending_result_rows:
+                self.pending_result_rows = 0
+                self.update_results()
+        finally:
+            self.root.after(RESULTS_REFRESH_MS, self.flush_result_rows)
     
     def update_results(self):
-        """Обновление таблицы результатов"""
-        # Очищаем таблицу
-        for item in self.keys_tree.get_children():
-            self.keys_tree.delete(item)
-        
-        # Добавляем ключи
-        for i, key_data in enumerate(self.all_sold_keys, 1):
-            self.keys_tree.insert("", "end", values=(
-                i,
-                key_data['key'],
-                key_data['order_id'],
-                key_data['date']
-            ))
-        
-        # Обновляем статистику
-        total_keys = len(self.all_sold_keys)
-        unique_keys = len(set(k['key'] for k in self.all_sold_keys))
-        duplicates = total_keys - unique_keys
-        
-        stats_text = f"📊 Всего ключей: {total_keys} | 🔑 Уникальных: {unique_keys} | 👥 Дубликатов: {duplicates}"
+        """Обновление таблицы результатов (только видимые строки) и статистики"""
+        self.pending_result_rows = 0
+        self.keys_tree.refresh()
+        self.show_key_stats()
+    
+    def show_key_stats(self):
+        """Статистика ключей (ведется хранилищем по мере добавления - без пересчета)"""
+        stats = self.all_sold_keys.stats
+        stats_text = (f"📊 Всего ключей: {stats.total} | 🔑 Уникальных: {stats.unique} | "
+                      f"👥 Дубликатов: {stats.duplicates} | 🕘 Проданы ранее: {stats.seen_before}")
         self.stats_label.configure(text=stats_text)
     
     def export_all_keys(self):
         """Экспорт всех ключей"""
-        if not self.all_sold_keys:
-            messagebox.showwarning("Предупреждение", "Нет данных для экспорта!")
-            return
-        
-        filename = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
-        )
-        
-        if filename:
-            try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    for key_data in self.all_sold_keys:
-                        f.write(f"{key_data['key']}\n")
-                messagebox.showinfo("Успех", f"Экспортировано {len(self.all_sold_keys)} ключей!")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Ошибка экспорта: {e}")
+        self.start_export("all", "keys")
     
     def export_unique_keys(self):
-        """Экспорт уникальных ключей"""
-        if not self.all_sold_keys:
-            messagebox.showwarning("Предупреждение", "Нет данных для экспорта!")
-            return
-        
-        unique_keys = list(set(k['key'] for k in self.all_sold_keys))
-        
-        filename = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
-        )
-        
-        if filename:
-            try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    for key in unique_keys:
-                        f.write(f"{key}\n")
-                messagebox.showinfo("Успех", f"Экспортировано {len(unique_keys)} уникальных ключей!")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Ошибка экспорта: {e}")
+        """Экспорт уникальных ключей (первая продажа каждого ключа)"""
+        self.start_export("unique", "unique_keys")
     
     def export_duplicates(self):
-        """Экспорт дубликатов"""
+        """Экспорт дубликатов (все продажи повторенных ключей)"""
+        if self.all_sold_keys and not self.all_sold_keys.stats.duplicates:
+            messagebox.showinfo("Информация", "Дубликатов не найдено!")
+            return
+        self.start_export("duplicates", "duplicates")
+    
+    def export_duplicate_report(self):
+        """Экспорт отчета: все продажи повторенных ключей, самые тяжелые группы первыми"""
+        if self.all_sold_keys and not self.all_sold_keys.stats.duplicates:
+            messagebox.showinfo("Информация", "Дубликатов не найдено!")
+            return
+        self.start_export("report", "duplicate_report")
+    
+    def start_export(self, kind, default_name):
+        """Экспорт в фоновом потоке: формат и сжатие - по расширению выбранного файла"""
         if not self.all_sold_keys:
             messagebox.showwarning("Предупреждение", "Нет данных для экспорта!")
             return
-        
-        # Находим дубликаты
-        seen = set()
-        duplicates = []
-        
-        for key_data in self.all_sold_keys:
-            key = key_data['key']
-            if key in seen:
-                duplicates.append(key)
-            else:
-                seen.add(key)
-        
-        if not duplicates:
-            messagebox.showinfo("Информация", "Дубликатов не найдено!")
+        if self.is_running:
+            messagebox.showwarning("Предупреждение", "Экспорт доступен после завершения анализа!")
+            return
+        if self.export_thread and self.export_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Экспорт уже выполняется!")
             return
         
         filename = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            initialfile=f"{default_name}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("CSV gzip", "*.csv.gz"), ("CSV zstd", "*.csv.zst"),
+                       ("JSONL", "*.jsonl"), ("JSONL gzip", "*.jsonl.gz"), ("JSONL zstd", "*.jsonl.zst"),
+                       ("Parquet", "*.parquet"), ("Text files (только ключи)", "*.txt"), ("All files", "*.*")]
         )
+        if not filename:
+            return
         
-        if filename:
+        def export():
             try:
-                with open(filename, "w", encoding="utf-8") as f:
-                    for key in set(duplicates):  # Убираем дубликаты дубликатов
-                        f.write(f"{key}\n")
-                messagebox.showinfo("Успех", f"Экспортировано {len(set(duplicates))} дубликатов!")
+                count = export_store(self.all_sold_keys, filename, kind,
+                                     progress=lambda done, total: self.events.put((EVENT_EXPORT_PROGRESS,
+                                                                                   (done, total))))
+                self.events.put((EVENT_EXPORT_DONE, (filename, count, None)))
             except Exception as e:
-                messagebox.showerror("Ошибка", f"Ошибка экспорта: {e}")
+                self.events.put((EVENT_EXPORT_DONE, (filename, 0, e)))
+        
+        self.set_export_buttons("disabled")
+        self.export_status_label.configure(text="⏳ Экспорт...")
+        self.export_thread = threading.Thread(target=export, daemon=True)
+        self.export_thread.start()
+    
+    def show_export_progress(self, done, total):
+        percent = done * 100 // total if total else 100
+        self.export_status_label.configure(text=f"⏳ Экспорт: {done}/{total} ({percent}%)")
+    
+    def export_finished(self, filename, count, error):
+        self.set_export_buttons("normal")
+        if error:
+            self.export_status_label.configure(text="❌ Ошибка экспорта")
+            messagebox.showerror("Ошибка", f"Ошибка экспорта: {error}")
+            return
+        self.export_status_label.configure(text=f"✅ Экспортировано строк: {count}")
+        self.log_message(f"💾 Экспорт: {count} строк в {filename}")
+    
+    def set_export_buttons(self, state):
+        for button in (self.export_all_btn, self.export_unique_btn, self.export_duplicates_btn,
+                       self.export_report_btn):
+            button.configure(state=state)
     
     def run(self):
         """Запуск приложения"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.log_writer:
+                self.log_writer.close()
 
 if __name__ == "__main__":
+    # Нужно для пула процессов разбора в exe-сборке
+    multiprocessing.freeze_support()
+    
     # Проверка зависимостей
     try:
         import FunPayAPI
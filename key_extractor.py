@@ -0,0 +1,274 @@
+"""
+Извлечение ключей из HTML страницы заказа.
+
+Движки: regex (сканер разметки secret-placeholder), selectolax, lxml и BeautifulSoup.
+regex возвращает тот же результат, что и BeautifulSoup: непонятную разметку
+и страницы без secret-placeholder он передает ему. selectolax и lxml строят дерево по правилам HTML5;
+известные расхождения (повторенный class, <span .../>, теги внутри ключа, textarea и подобные блоки)
+они тоже передают BeautifulSoup, но на сломанной разметке (например, текст внутри <table> или <select>,
+который HTML5 переносит) результат может отличаться
+"""
+import html as html_lib
+import re
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser  # selectolax < 1.0
+        HAS_SELECTOLAX = True
+    except ImportError:
+        HAS_SELECTOLAX = False
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+MIN_KEY_LENGTH = 6    # Более короткий текст - не ключ
+MAX_KEY_LENGTH = 200  # Ограничение для дополнительных селекторов
+
+# Дополнительные места, где могут оказаться ключи (если secret-placeholder нет)
+FALLBACK_SELECTORS = [
+    'span.secret',
+    'div.secret-placeholder',
+    'code',
+    'pre',
+    'span[style*="font-family: monospace"]'
+]
+
+SECRET_CLASS = 'secret-placeholder'
+
+# Без этих подстрок FALLBACK_SELECTORS гарантированно ничего не найдут
+_FALLBACK_HINT_RE = re.compile(r'secret|<code|<pre|monospace', re.IGNORECASE)
+
+# Атрибуты открывающего тега - по грамматике html.parser: значения в кавычках могут содержать ">"
+_ATTRS = (r"""(?:[\s/]*(?:(?<=['"\s/])[^\s/>][^\s/=>]*"""
+          r"""(?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?(?:\s|/(?!>))*)*)?\s*""")
+_ATTR_RE = re.compile(r"""((?<=['"\s/])[^\s/>][^\s/=>]*)(?:\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?""")
+
+# Разметка страницы по порядку: комментарии, блоки, содержимое которых - текст, а не теги,
+# и открывающие теги. Так span внутри комментария, <script> или значения атрибута не считается тегом
+_TOKEN_RE = re.compile(
+    r'<!--(?:(?P<comment>.*?)-->)?'
+    r'|<(?P<raw>script|style)(?=[\s/>])' + _ATTRS + r'/?>(?P<raw_body>.*?</\s*(?P=raw)\s*>)?'
+    r'|<(?P<text_tag>textarea|title|xmp|iframe|noembed|noframes|noscript|plaintext)(?=[\s/>])' + _ATTRS
+    + r'/?>(?:(?P<text_body>.*?)</\s*(?P=text_tag)\s*>)?'
+    r'|<(?P<tag>[a-zA-Z][^\t\n\r\f />\x00]*)(?P<attrs>' + _ATTRS + r')/?>',
+    re.IGNORECASE | re.DOTALL
+)
+# Блоки, содержимое которых HTML5-парсеры (selectolax, lxml) считают текстом,
+# а html.parser BeautifulSoup в некоторых версиях - разметкой
+_TEXT_BLOCK_RE = re.compile(
+    r'<(textarea|title|xmp|iframe|noembed|noframes|noscript|plaintext)(?=[\s/>])[^>]*>(.*?)(?:</\s*\1\s*>|\Z)',
+    re.IGNORECASE | re.DOTALL
+)
+# Открывающий тег целиком (значения атрибутов в кавычках могут содержать ">")
+_OPEN_TAG_RE = re.compile(r"""<[a-zA-Z](?:[^<>"']|"[^"]*"|'[^']*')*>""")
+# Текст span до следующего тега
+_SPAN_TEXT_RE = re.compile(r'([^<]*)(</span\s*>)?', re.IGNORECASE)
+
+_SECRET_XPATH = (
+    "//span[contains(concat(' ', normalize-space(@class), ' '), ' secret-placeholder ')]"
+)
+
+
+def _unique(keys):
+    """Удаление дубликатов с сохранением порядка"""
+    return list(dict.fromkeys(keys))
+
+
+def extract_keys_bs4(html):
+    """Извлечение ключей через BeautifulSoup (эталонный движок)"""
+    if not _FALLBACK_HINT_RE.search(html):
+        # Ни secret-placeholder, ни дополнительных селекторов - разбирать нечего
+        return []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    keys = []
+
+    # Основной способ - поиск по классу secret-placeholder
+    for element in soup.find_all('span', class_=SECRET_CLASS):
+        key = element.get_text().strip()
+        if len(key) >= MIN_KEY_LENGTH:
+            keys.append(key)
+
+    # Дополнительный поиск - по другим возможным классам
+    if not keys:
+        for selector in FALLBACK_SELECTORS:
+            for element in soup.select(selector):
+                key = element.get_text().strip()
+                if MIN_KEY_LENGTH <= len(key) < MAX_KEY_LENGTH:
+                    keys.append(key)
+
+    return _unique(keys)
+
+
+def _class_value(attrs):
+    """Значение атрибута class (при повторе атрибута - последнее, как в BeautifulSoup)"""
+    value = None
+    for name, raw_value in _ATTR_RE.findall(attrs):
+        if name.lower() == 'class':
+            if raw_value[:1] in ('"', "'"):
+                raw_value = raw_value[1:-1]
+            value = html_lib.unescape(raw_value)
+    return value
+
+
+def _secret_in_text_block(html):
+    """secret-placeholder внутри textarea, title и подобных блоков (такие страницы разбирает BeautifulSoup)"""
+    return any(SECRET_CLASS in match.group(2) for match in _TEXT_BLOCK_RE.finditer(html))
+
+
+def _ambiguous_secret_tag(html):
+    """Тег с secret-placeholder, который html.parser и HTML5-парсеры понимают по-разному:
+    повторенный class (BeautifulSoup берет последний, selectolax и lxml - первый) или <span .../>
+    (для html.parser - пустой элемент, для HTML5 - открывающий тег)"""
+    position = html.find(SECRET_CLASS)
+    while position >= 0:
+        start = html.rfind('<', 0, position)
+        tag = _OPEN_TAG_RE.match(html, start) if start >= 0 else None
+        if tag and tag.end() > position:
+            text = tag.group()
+            if text.endswith('/>') or sum(name.lower() == 'class' for name, _ in _ATTR_RE.findall(text)) > 1:
+                return True
+        position = html.find(SECRET_CLASS, position + 1)
+    return False
+
+
+def _defer_to_bs4(html):
+    """Страницы, где дерево selectolax и lxml может разойтись с BeautifulSoup"""
+    return SECRET_CLASS in html and (_secret_in_text_block(html) or _ambiguous_secret_tag(html))
+
+
+def extract_keys_regex(html):
+    """Извлечение ключей сканированием разметки secret-placeholder без построения дерева"""
+    keys = []
+    last_secret = html.rfind(SECRET_CLASS)
+    if last_secret >= 0:
+        for match in _TOKEN_RE.finditer(html):
+            if match.start() > last_secret:
+                # Дальше secret-placeholder не встречается - остаток страницы (обычно чат) не нужен
+                break
+            if match.group('raw'):
+                # Содержимое script и style - текст
+                if match.group('raw_body') is None:
+                    return extract_keys_bs4(html)
+                continue
+            if match.group('text_tag'):
+                # textarea, title и подобные разные версии html.parser разбирают по-разному -
+                # спорные случаи решает BeautifulSoup
+                if match.group('text_body') is None or '<' in match.group('text_body'):
+                    return extract_keys_bs4(html)
+                continue
+            if match.group('tag') is None:
+                # Комментарий: незакрытый или с ключом внутри тоже решает BeautifulSoup
+                if match.group('comment') is None or SECRET_CLASS in match.group('comment'):
+                    return extract_keys_bs4(html)
+                continue
+            if match.group('tag').lower() != 'span':
+                continue
+            class_value = _class_value(match.group('attrs'))
+            if class_value is None or SECRET_CLASS not in class_value.split():
+                continue
+            if match.group().endswith('/>'):
+                # <span .../> для html.parser - пустой элемент, текст после него не внутри span
+                continue
+            text = _SPAN_TEXT_RE.match(html, match.end())
+            if text.group(2) is None:
+                # Внутри span есть вложенные теги - нужен настоящий парсер
+                return extract_keys_bs4(html)
+            key = html_lib.unescape(text.group(1)).strip()
+            if len(key) >= MIN_KEY_LENGTH:
+                keys.append(key)
+    if not keys:
+        return extract_keys_bs4(html)
+    return _unique(keys)
+
+
+def extract_keys_selectolax(html):
+    """Извлечение ключей через selectolax (Lexbor)"""
+    if _defer_to_bs4(html):
+        return extract_keys_bs4(html)
+    keys = []
+    for node in HTMLParser(html).css('span.' + SECRET_CLASS):
+        if any(child.tag != '-text' for child in node.iter(include_text=True)):
+            # Вложенные теги и комментарии (style, title, ...) парсеры разбирают по-разному
+            return extract_keys_bs4(html)
+        key = node.text(deep=True).strip()
+        if len(key) >= MIN_KEY_LENGTH:
+            keys.append(key)
+    if not keys:
+        return extract_keys_bs4(html)
+    return _unique(keys)
+
+
+def extract_keys_lxml(html):
+    """Извлечение ключей через lxml"""
+    if _defer_to_bs4(html):
+        return extract_keys_bs4(html)
+    keys = []
+    if html.strip():
+        for element in lxml.html.fromstring(html).xpath(_SECRET_XPATH):
+            if len(element):
+                # Вложенные теги и комментарии (style, title, ...) парсеры разбирают по-разному
+                return extract_keys_bs4(html)
+            key = element.text_content().strip()
+            if len(key) >= MIN_KEY_LENGTH:
+                keys.append(key)
+    if not keys:
+        return extract_keys_bs4(html)
+    return _unique(keys)
+
+
+# Движки в порядке предпочтения для "auto": regex быстрее всех, так как не строит дерево,
+# а сложные случаи все равно разбирает BeautifulSoup
+EXTRACTORS = {
+    'regex': (extract_keys_regex, HAS_BS4),
+    'selectolax': (extract_keys_selectolax, HAS_SELECTOLAX and HAS_BS4),
+    'lxml': (extract_keys_lxml, HAS_LXML and HAS_BS4),
+    'bs4': (extract_keys_bs4, HAS_BS4),
+}
+AUTO_ORDER = ('regex', 'selectolax', 'lxml', 'bs4')
+
+
+def available_backends():
+    """Движки, доступные в текущем окружении"""
+    return [name for name in AUTO_ORDER if EXTRACTORS[name][1]]
+
+
+def resolve_backend(name="auto"):
+    """Имя движка для настройки (auto - самый быстрый доступный)"""
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        backends = available_backends()
+        if not backends:
+            raise ValueError("Не установлен beautifulsoup4: pip install beautifulsoup4")
+        return backends[0]
+    if name not in EXTRACTORS:
+        raise ValueError(f"Неизвестный движок разбора: {name} (доступны: auto, {', '.join(AUTO_ORDER)})")
+    if not EXTRACTORS[name][1]:
+        raise ValueError(f"Движок разбора {name} не установлен")
+    return name
+
+
+def get_extractor(name="auto"):
+    """Функция извлечения ключей html -> [ключи] для выбранного движка"""
+    return EXTRACTORS[resolve_backend(name)][0]
+
+
+def extract_keys_from_html(html, backend="auto"):
+    """Извлечение ключей из HTML"""
+    try:
+        return get_extractor(backend)(html)
+    except Exception as e:
+        print(f"Ошибка извлечения ключей: {e}")
+        return []
@@ -0,0 +1,68 @@
+"""
+История проданных ключей между запусками (SQLite): поиск повторов в других заказах, лотах и играх
+"""
+import sqlite3
+import threading
+import time
+
+
+class KeyIndex:
+    """Хранит каждый найденный ключ с заказом, игрой, лотом и датой.
+    Первичный ключ (key, order_id) - B-дерево, поэтому проверка ключа по всей истории
+    занимает O(log n) даже на миллионах записей"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keys ("
+            " key TEXT NOT NULL,"
+            " order_id TEXT NOT NULL,"
+            " game_id INTEGER,"
+            " lot_name TEXT,"
+            " date TEXT,"
+            " seen_at REAL NOT NULL,"
+            " PRIMARY KEY (key, order_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def record_order(self, order_id, keys, game_id=None, lot_name=None, date=None):
+        """Запоминает ключи заказа. Возвращает {ключ: самая ранняя продажа в другом заказе}
+        для ключей, которые уже встречались"""
+        order_id = str(order_id)
+        seen = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT order_id, game_id, lot_name, date FROM keys"
+                    " WHERE key = ? AND order_id != ? ORDER BY seen_at LIMIT 1",
+                    (key, order_id)
+                ).fetchone()
+                if row:
+                    seen[key] = {'order_id': row[0], 'game_id': row[1], 'lot_name': row[2], 'date': row[3]}
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO keys (key, order_id, game_id, lot_name, date, seen_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, order_id, game_id, lot_name, date, now) for key in keys]
+            )
+            self._conn.commit()
+        return seen
+
+    def clear(self):
+        """Полная очистка истории"""
+        with self._lock:
+            self._conn.execute("DELETE FROM keys")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def stats(self):
+        """(записей, уникальных ключей)"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT key) FROM keys").fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
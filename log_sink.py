@@ -0,0 +1,82 @@
+"""
+Лог анализа: ограниченный буфер строк для окна и фоновая запись полного лога в файлы с ротацией
+"""
+import logging
+import queue
+from collections import deque
+from logging.handlers import QueueListener, RotatingFileHandler
+
+DEFAULT_MAX_LINES = 2000
+DEFAULT_FILE_MAX_MB = 5
+DEFAULT_FILE_BACKUPS = 3
+
+
+class LogBuffer:
+    """Последние max_lines строк лога и строки, еще не показанные в окне.
+
+    flush() говорит, что сделать с текстовым полем, чтобы в нем было не больше max_lines строк:
+    сколько строк удалить сверху и какой текст дописать в конец"""
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES):
+        self.max_lines = max(1, int(max_lines))
+        self.lines = deque(maxlen=self.max_lines)
+        self._pending = []
+        self._shown = 0  # Строк сейчас в текстовом поле
+
+    def append(self, text):
+        """Добавление сообщения: многострочное занимает в поле несколько строк
+        (деление - только по \n, как в Tk Text; в конце перевод строки добавляется, если его нет)"""
+        lines = [line + "\n" for line in text.split("\n")]
+        if text.endswith("\n"):
+            lines.pop()
+        self.lines.extend(lines)
+        self._pending.extend(lines)
+
+    def flush(self):
+        """(удалить строк сверху или None - заменить все, текст для добавления) или None, если нового нет"""
+        if not self._pending:
+            return None
+        pending, self._pending = self._pending, []
+        new_count = len(pending)
+        if new_count >= self.max_lines:
+            # Новых строк больше, чем помещается - поле заполняется заново
+            self._shown = len(self.lines)
+            return None, "".join(self.lines)
+        text = "".join(pending)
+        excess = max(0, self._shown + new_count - self.max_lines)
+        self._shown += new_count - excess
+        return excess, text
+
+    def clear(self):
+        self.lines.clear()
+        self._pending = []
+        self._shown = 0
+
+
+class RotatingLogWriter:
+    """Запись полного лога в файл с ротацией в фоновом потоке (logging.QueueListener)"""
+
+    def __init__(self, path, max_mb=DEFAULT_FILE_MAX_MB, backups=DEFAULT_FILE_BACKUPS):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        handler = RotatingFileHandler(path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups,
+                                      encoding="utf-8")
+        handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def write(self, message, created=None):
+        """Постановка сообщения в очередь записи (не блокирует вызывающий поток)"""
+        record = logging.makeLogRecord({'msg': message, 'levelno': logging.INFO, 'levelname': "INFO"})
+        if created:
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+        self._queue.put_nowait(record)
+
+    def close(self):
+        """Дописывает очередь и закрывает файл"""
+        if self._listener:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
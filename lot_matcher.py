@@ -0,0 +1,115 @@
+"""
+Поиск нескольких лотов в описании заказа за один проход (автомат Ахо-Корасик):
+одна пагинация истории продаж обслуживает сразу все лоты
+"""
+from collections import deque
+
+try:
+    import ahocorasick  # pyahocorasick - тот же автомат на C
+    HAS_PYAHOCORASICK = True
+except ImportError:
+    HAS_PYAHOCORASICK = False
+
+# До стольких лотов проверка `lot in text` по каждому лоту (цикл на C) быстрее автомата на Python
+AUTOMATON_MIN_LOTS = 128
+
+
+def lot_list(lot_names):
+    """Список лотов из строки (один лот) или списка; пустые и повторы отбрасываются"""
+    if isinstance(lot_names, str):
+        lot_names = [lot_names]
+    lots = []
+    for lot_name in lot_names or []:
+        lot_name = str(lot_name).strip()
+        if lot_name and lot_name not in lots:
+            lots.append(lot_name)
+    return lots
+
+
+def split_lots(text, separator=";"):
+    """Лоты из поля ввода: через точку с запятой или с новой строки"""
+    return lot_list(text.replace("\n", separator).split(separator))
+
+
+class LotMatcher:
+    """Подстроки-лоты в описаниях заказов (с учетом регистра, как `lot_name in description`).
+
+    Если описание подходит к нескольким лотам, заказ относится к самому длинному из них
+    ("Lot A Deluxe" точнее, чем "Lot A"), при равной длине - к указанному раньше"""
+
+    def __init__(self, lot_names, min_automaton_lots=AUTOMATON_MIN_LOTS):
+        self.lots = lot_list(lot_names)
+        # Порядок предпочтения: длиннее - точнее, затем порядок в списке
+        self._rank = {lot: rank for rank, lot in
+                      enumerate(sorted(self.lots, key=lambda lot: (-len(lot), self.lots.index(lot))))}
+        self._automaton = None
+        if len(self.lots) > 1 and HAS_PYAHOCORASICK:
+            self._automaton = self._build_native()
+        elif len(self.lots) >= max(2, min_automaton_lots):
+            self._automaton = self._build()
+
+    def __len__(self):
+        return len(self.lots)
+
+    def _build(self):
+        """Бор по всем лотам и суффиксные ссылки (обход в ширину)"""
+        goto = [{}]
+        output = [[]]
+        for lot in self.lots:
+            state = 0
+            for char in lot:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(lot)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(char, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+        return goto, fail, output
+
+    def _build_native(self):
+        automaton = ahocorasick.Automaton()
+        for lot in self.lots:
+            automaton.add_word(lot, lot)
+        automaton.make_automaton()
+        return automaton
+
+    def matches(self, text):
+        """Все лоты, найденные в тексте (в порядке списка)"""
+        if not text or not self.lots:
+            return []
+        if self._automaton is None:
+            return [lot for lot in self.lots if lot in text]
+        if HAS_PYAHOCORASICK:
+            found = {lot for _, lot in self._automaton.iter(text)}
+        else:
+            goto, fail, output = self._automaton
+            found = set()
+            state = 0
+            for char in text:
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    found.update(output[state])
+        return [lot for lot in self.lots if lot in found]
+
+    def match(self, text):
+        """Лот заказа с таким описанием или None"""
+        found = self.matches(text)
+        if not found:
+            return None
+        return min(found, key=self._rank.__getitem__)
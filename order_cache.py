@@ -0,0 +1,98 @@
+"""
+Локальный кэш HTML закрытых заказов (SQLite)
+"""
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_MAX_SIZE_MB = 500
+
+
+class OrderCache:
+    """Хранит сжатый HTML заказов по их ID. Закрытые заказы не меняются,
+    поэтому повторный анализ берет их отсюда без запросов к FunPay"""
+
+    def __init__(self, path, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS orders ("
+            " order_id TEXT PRIMARY KEY,"
+            " html BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS orders_accessed ON orders(accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM orders").fetchone()[0]
+
+    def get(self, order_id):
+        """HTML заказа из кэша или None"""
+        with self._lock:
+            row = self._conn.execute("SELECT html FROM orders WHERE order_id = ?", (str(order_id),)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE orders SET accessed_at = ? WHERE order_id = ?",
+                               (time.time(), str(order_id)))
+            self._conn.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, order_id, html):
+        """Сохранение HTML заказа с вытеснением старых записей при превышении размера"""
+        data = zlib.compress(html.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM orders WHERE order_id = ?", (str(order_id),)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO orders (order_id, html, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (str(order_id), data, len(data), now, now)
+            )
+            self._total_bytes += len(data) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Удаляем давно не использованные заказы, пока не освободим ~10% лимита
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT order_id, size FROM orders ORDER BY accessed_at").fetchall()
+        to_delete = []
+        for order_id, size in rows:
+            if self._total_bytes <= target:
+                break
+            to_delete.append((order_id,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM orders WHERE order_id = ?", to_delete)
+
+    def invalidate(self, order_id):
+        """Удаление одного заказа из кэша"""
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM orders WHERE order_id = ?", (str(order_id),)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM orders WHERE order_id = ?", (str(order_id),))
+                self._conn.commit()
+                self._total_bytes -= row[0]
+
+    def clear(self):
+        """Полная очистка кэша"""
+        with self._lock:
+            self._conn.execute("DELETE FROM orders")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._total_bytes = 0
+
+    def stats(self):
+        """(количество заказов, размер в байтах)"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        return count, self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,156 @@
+"""
+Запись о заказе: ключи и данные страницы заказа (покупатель, сумма, описание лота,
+разделы с товаром), собранные за один проход по HTML
+"""
+import html as html_lib
+import re
+
+from key_extractor import SECRET_CLASS, extract_keys_from_html
+
+STATUS_CLOSED = "closed"
+STATUS_REFUNDED = "refunded"
+STATUS_PAID = "paid"
+
+# Заголовки блоков param-item на странице заказа
+PARAM_SHORT_DESCRIPTION = "Краткое описание"
+PARAM_FULL_DESCRIPTION = "Подробное описание"
+PARAM_CATEGORY = "Категория"
+PARAM_GAME = "Игра"
+PARAM_AMOUNT = "Количество"
+PARAM_SUM = "Сумма"
+_NAMED_PARAMS = (PARAM_SHORT_DESCRIPTION, PARAM_FULL_DESCRIPTION, PARAM_CATEGORY, PARAM_GAME, PARAM_AMOUNT, PARAM_SUM)
+
+_PARAM_ITEM_RE = re.compile(r'<div\b[^>]*class\s*=\s*["\'][^"\']*\bparam-item\b[^"\']*["\'][^>]*>', re.IGNORECASE)
+_DIV_TAG_RE = re.compile(r'<(/?)div\b[^>]*>', re.IGNORECASE)
+_H5_RE = re.compile(r'<h5\b[^>]*>(.*?)</h5\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACES_RE = re.compile(r'\s+')
+_STATUS_SPAN_RE = re.compile(r'<span\b[^>]*class\s*=\s*["\']text-(success|warning)["\'][^>]*>(.*?)</span\s*>',
+                             re.IGNORECASE | re.DOTALL)
+_BUYER_RE = re.compile(
+    r'class\s*=\s*["\']media-user-name["\'][^>]*>\s*<a\b[^>]*href\s*=\s*["\'][^"\']*/users/(\d+)/?["\'][^>]*>(.*?)</a\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_NUMBER_RE = re.compile(r'\d[\d\s]*(?:[.,]\d+)?')
+
+
+def _text(fragment):
+    """Текст фрагмента HTML без тегов, с одиночными пробелами"""
+    return _SPACES_RE.sub(" ", html_lib.unescape(_TAG_RE.sub(" ", fragment))).strip()
+
+
+def _number(text):
+    """Первое число в тексте ("1 234,50 ₽" -> 1234.5)"""
+    match = _NUMBER_RE.search(text or "")
+    if not match:
+        return None
+    return float(match.group().replace(" ", "").replace("\xa0", "").replace(",", "."))
+
+
+def _param_items(html):
+    """Блоки param-item: пары (заголовок h5, HTML содержимого после заголовка)"""
+    items = []
+    position = 0
+    while True:
+        # Быстрый поиск подстроки, регулярное выражение - только для проверки найденного тега
+        found = html.find("param-item", position)
+        if found == -1:
+            break
+        position = found + 1
+        tag_start = html.rfind("<", 0, found)
+        match = _PARAM_ITEM_RE.match(html, tag_start) if tag_start != -1 else None
+        if not match or match.end() <= found:
+            continue
+        position = match.end()
+        # Конец блока - парный закрывающий </div> с учетом вложенных div
+        depth = 1
+        end = len(html)
+        for tag in _DIV_TAG_RE.finditer(html, match.end()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = tag.start()
+                break
+        body = html[match.end():end]
+        title = _H5_RE.search(body)
+        if title:
+            items.append((_text(title.group(1)), body[title.end():]))
+    return items
+
+
+def _first_status_span(html, kind):
+    """Текст первого span class="text-<kind>" или None"""
+    position = html.find("text-" + kind)
+    while position != -1:
+        # Как и в _param_items: быстрый поиск подстроки, регулярное выражение - только для найденного тега
+        tag_start = html.rfind("<", 0, position)
+        match = _STATUS_SPAN_RE.match(html, tag_start) if tag_start != -1 else None
+        if match and match.group(1).lower() == kind:
+            return _text(match.group(2))
+        position = html.find("text-" + kind, position + 1)
+    return None
+
+
+def order_status(html):
+    """Статус заказа по странице (как в FunPayAPI.Account.get_order)"""
+    if _first_status_span(html, "warning") == "Возврат":
+        return STATUS_REFUNDED
+    if _first_status_span(html, "success") == "Закрыт":
+        return STATUS_CLOSED
+    return STATUS_PAID
+
+
+def _section_key_count(body, keys):
+    """Сколько ключей страницы в разделе с товаром: текст после каждого secret-placeholder
+    сверяется с уже извлеченными ключами, без повторного разбора раздела"""
+    found = set()
+    position = body.find(SECRET_CLASS)
+    while position != -1:
+        start = body.find(">", position) + 1
+        end = body.find("<", start) if start else -1
+        if end != -1:
+            text = html_lib.unescape(body[start:end]).strip()
+            if text in keys:
+                found.add(text)
+        position = body.find(SECRET_CLASS, position + 1)
+    return len(found)
+
+
+def parse_order_page(html, order_id=None, date=None, backend="auto"):
+    """Запись о заказе из HTML страницы заказа.
+    Ключи - тем же движком, что и extract_keys_from_html (один раз на страницу), остальное - сканированием разметки"""
+    keys = extract_keys_from_html(html, backend)
+    key_set = set(keys)
+    params = {}
+    secret_sections = []
+    for title, body in _param_items(html):
+        if SECRET_CLASS in body:
+            # Раздел с товаром: сами ключи уже в 'keys', здесь только раскладка
+            secret_sections.append({'title': title, 'keys': _section_key_count(body, key_set)})
+        else:
+            params.setdefault(title, _text(body))
+    amount = _number(params.get(PARAM_AMOUNT))
+
+    buyer = buyer_id = None
+    chat_start = html.find("chat-header")
+    if chat_start != -1:
+        match = _BUYER_RE.search(html, chat_start)
+        if match:
+            buyer_id, buyer = int(match.group(1)), _text(match.group(2))
+
+    return {
+        'order_id': order_id,
+        'date': date,
+        'status': order_status(html),
+        'keys': keys,
+        'buyer': buyer,
+        'buyer_id': buyer_id,
+        'game': params.get(PARAM_GAME),
+        'category': params.get(PARAM_CATEGORY),
+        'short_description': params.get(PARAM_SHORT_DESCRIPTION),
+        'full_description': params.get(PARAM_FULL_DESCRIPTION),
+        'amount': int(amount) if amount is not None and amount.is_integer() else amount,
+        'price': _number(params.get(PARAM_SUM)),
+        'secret_sections': secret_sections,
+        # Остальные поля страницы, для которых нет отдельного ключа
+        'params': {title: text for title, text in params.items() if title not in _NAMED_PARAMS},
+    }
@@ -0,0 +1,41 @@
+"""
+Разбор страниц заказов в пуле процессов: разбор HTML не держит GIL потоков загрузки
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from key_extractor import resolve_backend
+from order_record import parse_order_page
+
+
+# Функция уровня модуля - ее можно передать в дочерний процесс
+def _parse_order_page(html, order_id, date, backend):
+    return parse_order_page(html, order_id, date, backend)
+
+
+class ParsePool:
+    """Пул процессов по числу ядер для parse_order_page"""
+
+    def __init__(self, backend="auto", processes=None):
+        self.backend = resolve_backend(backend)
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self._executor = ProcessPoolExecutor(max_workers=self.processes)
+
+    def parse(self, html, order_id=None, date=None):
+        """Запись о заказе (parse_order_page)"""
+        return self._executor.submit(_parse_order_page, html, order_id, date, self.backend).result()
+
+    async def parse_async(self, html, order_id=None, date=None):
+        """Запись о заказе без блокировки цикла событий"""
+        future = self._executor.submit(_parse_order_page, html, order_id, date, self.backend)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
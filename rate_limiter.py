@@ -0,0 +1,114 @@
+"""
+Ограничение частоты запросов к FunPay
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket: общий лимит запросов для всех потоков"""
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate должен быть больше нуля")
+        self.rate = float(rate)          # Токенов (запросов) в секунду
+        self.capacity = float(capacity)  # Максимальный "запас" запросов подряд
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate):
+        """Смена темпа на ходу (уже накопленные токены сохраняются)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def reserve(self):
+        """Резервирует токен и возвращает, сколько секунд нужно подождать до запроса"""
+        with self._lock:
+            self._refill(time.monotonic())
+            # Токены могут уходить в минус - так каждый поток получает свой слот
+            # во времени и общий темп не превышает rate
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, is_cancelled=None):
+        """Ожидание разрешения на запрос. Возвращает False, если ожидание прервано"""
+        deadline = time.monotonic() + self.reserve()
+        while True:
+            if is_cancelled and is_cancelled():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.1))
+
+    async def acquire_async(self, is_cancelled=None):
+        """То же, что acquire, но без блокировки цикла событий asyncio"""
+        deadline = time.monotonic() + self.reserve()
+        while True:
+            if is_cancelled and is_cancelled():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            await asyncio.sleep(min(remaining, 0.1))
+
+
+class AdaptivePacer:
+    """AIMD-регулятор темпа: плавно ускоряется, пока запросы проходят,
+    и резко замедляется при 429 и ошибках. Темп ограничен интервалами [min_interval, max_interval]"""
+
+    def __init__(self, min_interval, max_interval, increase_steps=20,
+                 throttle_factor=0.5, failure_factor=0.75, unpaced_rate=1000.0):
+        # unpaced_rate - потолок темпа при нулевом min_interval
+        self.max_rate = 1.0 / min_interval if min_interval > 0 else float(unpaced_rate)
+        self.min_rate = 1.0 / max_interval if max_interval > 0 else self.max_rate
+        self.min_rate = min(self.min_rate, self.max_rate)
+        # Аддитивный шаг: от минимального темпа до максимального за increase_steps успешных запросов
+        self.increase_step = (self.max_rate - self.min_rate) / increase_steps
+        self.throttle_factor = throttle_factor
+        self.failure_factor = failure_factor
+        # Начинаем с середины диапазона задержек, как раньше
+        start_interval = (min_interval + max_interval) / 2
+        start_rate = 1.0 / start_interval if start_interval > 0 else self.max_rate
+        self.bucket = TokenBucket(rate=min(max(start_rate, self.min_rate), self.max_rate), capacity=1)
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        """Текущий темп, запросов в секунду"""
+        return self.bucket.rate
+
+    @property
+    def interval(self):
+        """Текущий интервал между запросами, секунд"""
+        return 1.0 / self.bucket.rate
+
+    def acquire(self, is_cancelled=None):
+        return self.bucket.acquire(is_cancelled)
+
+    async def acquire_async(self, is_cancelled=None):
+        return await self.bucket.acquire_async(is_cancelled)
+
+    def _set_rate(self, rate):
+        self.bucket.set_rate(min(max(rate, self.min_rate), self.max_rate))
+
+    def on_success(self):
+        """Успешный ответ - аддитивное ускорение"""
+        with self._lock:
+            self._set_rate(self.bucket.rate + self.increase_step)
+
+    def on_failure(self, status_code=None):
+        """Ошибка запроса - мультипликативное замедление (для 429 сильнее)"""
+        factor = self.throttle_factor if status_code == 429 else self.failure_factor
+        with self._lock:
+            self._set_rate(self.bucket.rate * factor)
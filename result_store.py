@@ -0,0 +1,259 @@
+"""
+Компактное хранилище найденных ключей: колонки вместо словаря на каждый ключ
+"""
+from array import array
+
+
+class SoldKey:
+    """Ключ из хранилища (легкое представление строки, данные остаются в колонках).
+    Поддерживает доступ как к словарю: key_data['key'], key_data.get('seen_before').
+    lot_name есть в словаре, только если лот известен (старые контрольные точки его не содержат)"""
+
+    __slots__ = ("_store", "_index")
+    FIELDS = ('key', 'order_id', 'date', 'seen_before', 'lot_name')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def key(self):
+        return self._store._keys[self._index]
+
+    @property
+    def order_id(self):
+        return self._store._order_ids[self._store._orders[self._index]]
+
+    @property
+    def date(self):
+        return self._store._order_dates[self._store._orders[self._index]]
+
+    @property
+    def seen_before(self):
+        return self._store._seen_before.get(self._index)
+
+    @property
+    def lot_name(self):
+        return self._store._order_lots[self._store._orders[self._index]]
+
+    def __getitem__(self, name):
+        if name not in self.keys():
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name) if name in self.keys() else default
+
+    def keys(self):
+        return self.FIELDS if self.lot_name is not None else self.FIELDS[:-1]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, (SoldKey, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, SoldKey) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SoldKey({self.to_dict()!r})"
+
+
+class DuplicateGroup:
+    """Повторенный ключ и все его продажи (по порядку); ID, даты и лоты берутся из хранилища при обращении"""
+
+    __slots__ = ("_store", "key", "numbers", "orders")
+
+    def __init__(self, store, key, numbers):
+        self._store = store
+        self.key = key
+        self.numbers = numbers  # Номера заказов продаж
+        self.orders = len(set(numbers))  # Разных заказов (ключ может повторяться и внутри одного заказа)
+
+    @property
+    def count(self):
+        return len(self.numbers)
+
+    @property
+    def order_ids(self):
+        return [self._store._order_ids[number] for number in self.numbers]
+
+    @property
+    def dates(self):
+        return [self._store._order_dates[number] for number in self.numbers]
+
+    @property
+    def lot_names(self):
+        return [self._store._order_lots[number] for number in self.numbers]
+
+    def __repr__(self):
+        return f"DuplicateGroup({self.key!r}, {self.order_ids!r})"
+
+
+class KeyStats:
+    """Статистика, которая обновляется при добавлении каждого ключа:
+    итоги за O(1), списки дубликатов - за O(число дубликатов)"""
+
+    def __init__(self):
+        self.total = 0
+        self.seen_before = 0      # Ключей, проданных ранее в других заказах
+        self._first_order = {}    # Ключ -> номер заказа первой продажи (он же множество уникальных)
+        self._repeated = {}       # Повторенный ключ -> номера всех его заказов
+
+    def add(self, key, order_number, seen_before=False):
+        self.total += 1
+        if seen_before:
+            self.seen_before += 1
+        first = self._first_order.get(key)
+        if first is None:
+            self._first_order[key] = order_number
+            return
+        orders = self._repeated.get(key)
+        if orders is None:
+            self._repeated[key] = [first, order_number]
+        else:
+            orders.append(order_number)
+
+    @property
+    def unique(self):
+        return len(self._first_order)
+
+    @property
+    def duplicates(self):
+        return self.total - self.unique
+
+    def occurrences(self, key):
+        """Сколько раз продан ключ"""
+        if key in self._repeated:
+            return len(self._repeated[key])
+        return 1 if key in self._first_order else 0
+
+    def clear(self):
+        self.total = 0
+        self.seen_before = 0
+        self._first_order.clear()
+        self._repeated.clear()
+
+    def as_dict(self):
+        return {'total_keys': self.total, 'unique_keys': self.unique, 'duplicates': self.duplicates,
+                'seen_before': self.seen_before}
+
+
+class ResultStore:
+    """Найденные ключи в порядке добавления.
+
+    На ключ хранится только его строка и номер заказа (4 байта в array);
+    ID и дата заказа - один раз на заказ, продажи в других заказах - только для таких ключей.
+    Заполняется одним потоком движка (под его блокировкой), читается из других потоков"""
+
+    def __init__(self, rows=()):
+        self._keys = []             # Строки ключей
+        self._orders = array('I')   # Номер заказа для каждого ключа
+        self._order_ids = []        # Заказы: ID
+        self._order_dates = []      # Заказы: дата
+        self._order_lots = []       # Заказы: лот (None - неизвестен)
+        self._order_numbers = {}    # ID заказа -> номер
+        self._seen_before = {}      # Номер ключа -> ранняя продажа в другом заказе (key_index)
+        self.stats = KeyStats()
+        self.extend(rows)
+
+    def _order_number(self, order_id, date, lot_name=None):
+        number = self._order_numbers.get(order_id)
+        if number is None:
+            number = len(self._order_ids)
+            self._order_ids.append(order_id)
+            self._order_dates.append(date)
+            self._order_lots.append(lot_name)
+            self._order_numbers[order_id] = number
+        return number
+
+    def add(self, key, order_id, date, seen_before=None, lot_name=None):
+        """Добавление ключа, возвращает его представление"""
+        number = self._order_number(order_id, date, lot_name)
+        index = len(self._keys)
+        if seen_before:
+            self._seen_before[index] = seen_before
+        self._keys.append(key)
+        self.stats.add(key, number, bool(seen_before))
+        # Длина хранилища - по колонке заказов, поэтому она растет последней
+        self._orders.append(number)
+        return SoldKey(self, index)
+
+    def append(self, key_data):
+        """Добавление ключа из словаря (например, из контрольной точки)"""
+        self.add(key_data['key'], key_data['order_id'], key_data['date'], key_data.get('seen_before'),
+                 key_data.get('lot_name'))
+
+    def extend(self, rows):
+        for key_data in rows:
+            self.append(key_data)
+
+    def clear(self):
+        self._keys.clear()
+        del self._orders[:]
+        self._order_ids.clear()
+        self._order_dates.clear()
+        self._order_lots.clear()
+        self._order_numbers.clear()
+        self._seen_before.clear()
+        self.stats.clear()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SoldKey(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return SoldKey(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield SoldKey(self, index)
+
+    def duplicate_report(self):
+        """Группы повторенных ключей, самые тяжелые первыми: больше разных заказов (покупателей),
+        затем больше продаж; при равенстве - в порядке первого повтора.
+        Группы уже собраны статистикой при добавлении ключей, здесь только выборка и сортировка"""
+        # list() копирует группы за один шаг: движок может добавлять ключи в это время
+        groups = [DuplicateGroup(self, key, numbers) for key, numbers in list(self.stats._repeated.items())]
+        groups.sort(key=lambda group: (-group.orders, -len(group.numbers)))
+        return groups
+
+    def export_rows(self, kind="all"):
+        """Строки (ключ, ID заказа, дата, лот, продаж ключа) без промежуточных списков:
+        all - все ключи по порядку, unique - первая продажа каждого ключа,
+        duplicates - все продажи повторенных ключей, сгруппированные по ключу,
+        report - то же, группы в порядке duplicate_report()"""
+        stats = self.stats
+        ids, dates, lots = self._order_ids, self._order_dates, self._order_lots
+        if kind == "all":
+            for index in range(len(self)):
+                key, number = self._keys[index], self._orders[index]
+                yield key, ids[number], dates[number], lots[number], stats.occurrences(key)
+        elif kind == "unique":
+            for key, number in stats._first_order.items():
+                yield key, ids[number], dates[number], lots[number], stats.occurrences(key)
+        elif kind == "duplicates":
+            for key, numbers in stats._repeated.items():
+                for number in numbers:
+                    yield key, ids[number], dates[number], lots[number], len(numbers)
+        elif kind == "report":
+            for group in self.duplicate_report():
+                for number in group.numbers:
+                    yield group.key, ids[number], dates[number], lots[number], len(group.numbers)
+        else:
+            raise ValueError(f"Неизвестный набор строк: {kind}")
+
+    def export_count(self, kind="all"):
+        """Число строк export_rows(kind)"""
+        if kind == "all":
+            return len(self)
+        if kind == "unique":
+            return self.stats.unique
+        if kind in ("duplicates", "report"):
+            return self.stats.duplicates + len(self.stats._repeated)
+        raise ValueError(f"Неизвестный набор строк: {kind}")
@@ -0,0 +1,96 @@
+"""
+Политика повторов запросов: ограниченное число попыток,
+экспоненциальная задержка с джиттером и поддержка Retry-After
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RetryCancelled(Exception):
+    """Ожидание повтора прервано (анализ остановлен)"""
+
+
+def retry_after_seconds(exc):
+    """Значение заголовка Retry-After из ответа, приложенного к исключению, в секундах"""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """Повторяет вызов при ошибках из retry_on (кроме no_retry_on) не более max_attempts раз"""
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=60.0,
+                 retry_on=(Exception,), no_retry_on=()):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.no_retry_on = no_retry_on
+
+    def backoff(self, attempt, retry_after=None):
+        """Пауза перед повтором номер attempt (full jitter), но не меньше Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, func, is_cancelled=None, on_retry=None):
+        """Вызов func с повторами. После последней неудачной попытки исключение пробрасывается.
+        on_retry(exc, attempt, delay) вызывается перед каждой паузой"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func()
+            except self.no_retry_on:
+                raise
+            except self.retry_on as e:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, retry_after_seconds(e))
+                if on_retry:
+                    on_retry(e, attempt, delay)
+                deadline = time.monotonic() + delay
+                while time.monotonic() < deadline:
+                    if is_cancelled and is_cancelled():
+                        raise RetryCancelled()
+                    time.sleep(min(0.1, max(0.0, deadline - time.monotonic())))
+
+    async def call_async(self, coro_func, is_cancelled=None, on_retry=None):
+        """Асинхронный вариант call: coro_func() возвращает корутину"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await coro_func()
+            except self.no_retry_on:
+                raise
+            except self.retry_on as e:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, retry_after_seconds(e))
+                if on_retry:
+                    on_retry(e, attempt, delay)
+                deadline = time.monotonic() + delay
+                while time.monotonic() < deadline:
+                    if is_cancelled and is_cancelled():
+                        raise RetryCancelled()
+                    await asyncio.sleep(min(0.1, max(0.0, deadline - time.monotonic())))
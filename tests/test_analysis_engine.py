@@ -0,0 +1,176 @@
+import configparser
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import (EVENT_FINISHED, EVENT_KEYS, EVENT_LOG, EVENT_PROGRESS, STATUS_COMPLETED,
+                             STATUS_INCOMPLETE, AnalysisEngine, AnalysisSettings, dispatch_events)
+from checkpoint import AnalysisCheckpoint
+from rate_limiter import AdaptivePacer
+from retry_policy import RetryPolicy
+
+
+class FakeAccount:
+    """Три страницы по 4 заказа, половина заказов - нужный лот"""
+
+    def get_sells(self, start_from=None, game=None, **kwargs):
+        page = int(start_from or 0)
+        batch = [
+            SimpleNamespace(id=f"{page}-{i}", description="Game A" if i % 2 == 0 else "Game B",
+                            created_at="01.01.2024")
+            for i in range(4)
+        ]
+        return (str(page + 1) if page < 2 else None), batch
+
+    def method(self, request_method, api_method, headers, payload, **kwargs):
+        order_id = api_method.split("/")[1]
+        html = (f'<div class="user-link-name">seller</div><span class="text-success">Закрыт</span>'
+                f'<span class="secret-placeholder">KEY-{order_id}-XYZ</span>')
+        return SimpleNamespace(status_code=200, content=html.encode())
+
+
+def test_engine_run_without_gui():
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=2, async_http=False)
+    engine = AnalysisEngine(FakeAccount(), settings, cache_file=None, checkpoint_file=None, key_index_file=None)
+
+    summary = engine.run(1, "Game A")
+
+    rows, progress, finished = [], [], []
+    dispatch_events(engine.events, {
+        EVENT_KEYS: rows.extend,
+        EVENT_PROGRESS: lambda processed, matched: progress.append((processed, matched)),
+        EVENT_FINISHED: finished.append,
+    })
+
+    assert summary['status'] == STATUS_COMPLETED
+    assert summary['pages'] == 3
+    assert summary['matched'] == 6
+    assert summary['total_keys'] == 6
+    assert sorted(key_data['order_id'] for _, key_data in rows) == [
+        "0-0", "0-2", "1-0", "1-2", "2-0", "2-2"
+    ]
+    # Прогресс схлопывается до последнего значения, итог - последнее событие
+    assert progress[-1] == (6, 6)
+    assert finished == [summary]
+    assert engine.order_records["1-2"]['keys'] == ["KEY-1-2-XYZ"]
+    assert engine.order_records["1-2"]['status'] == "closed"
+
+
+class ResoldKeyAccount(FakeAccount):
+    """Заказ 1-0 без ключей, заказы 2-* повторяют ключи страницы 0"""
+
+    def method(self, request_method, api_method, headers, payload, **kwargs):
+        order_id = api_method.split("/")[1]
+        if order_id == "1-0":
+            html = '<div class="user-link-name">seller</div><span class="text-success">Закрыт</span>'
+            return SimpleNamespace(status_code=200, content=html.encode())
+        return super().method(request_method, "orders/" + order_id.replace("2-", "0-") + "/", headers, payload)
+
+
+def test_order_log_messages(tmp_path):
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=1, async_http=False)
+    engine = AnalysisEngine(ResoldKeyAccount(), settings, cache_file=None, checkpoint_file=None,
+                            key_index_file=str(tmp_path / "history.sqlite3"))
+    summary = engine.run(1, "Game A")
+
+    messages = []
+    dispatch_events(engine.events, {EVENT_LOG: lambda message, created=None: messages.append(message)})
+
+    assert summary['total_keys'] == 5 and summary['seen_before'] == 2
+    assert sum(message.startswith("✅ Найдено ключей") for message in messages) == 5
+    # "Не найдены" - только для заказа без ключей, а не для каждого заказа без ранних продаж
+    assert messages.count("⚠️ Ключи не найдены в заказе") == 1
+    assert sum(message.startswith("🕘 Ранее проданы") for message in messages) == 2
+
+
+class FlakyAccount(FakeAccount):
+    """Сбои соединения requests: страница 1 - один раз, заказ 0-2 - failures раз"""
+
+    def __init__(self, failures=1):
+        self.failures = {"page-1": 1, "0-2": failures}
+
+    def fail_once(self, name):
+        if self.failures.get(name, 0) > 0:
+            self.failures[name] -= 1
+            raise requests.exceptions.ConnectionError(f"connection reset: {name}")
+
+    def get_sells(self, start_from=None, game=None, **kwargs):
+        self.fail_once(f"page-{int(start_from or 0)}")
+        return super().get_sells(start_from, game, **kwargs)
+
+    def method(self, request_method, api_method, headers, payload, **kwargs):
+        self.fail_once(api_method.split("/")[1])
+        return super().method(request_method, api_method, headers, payload, **kwargs)
+
+
+def run_flaky(monkeypatch, failures, checkpoint_file=None):
+    monkeypatch.setattr(RetryPolicy, "backoff", lambda self, attempt, retry_after=None: 0.0)
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=1, max_retries=2, async_http=False)
+    engine = AnalysisEngine(FlakyAccount(failures), settings, cache_file=None, checkpoint_file=checkpoint_file,
+                            key_index_file=None)
+    return engine.run(1, "Game A")
+
+
+def test_connection_errors_are_retried(monkeypatch):
+    summary = run_flaky(monkeypatch, failures=1)
+
+    assert summary['status'] == STATUS_COMPLETED
+    assert summary['pages'] == 3
+    assert summary['total_keys'] == 6
+    assert summary['failed'] == 0
+
+
+def test_connection_error_after_all_retries_is_dead_lettered(monkeypatch):
+    # 2 попытки в основном проходе и 2 при повторе в конце - заказ так и не загружен
+    summary = run_flaky(monkeypatch, failures=4)
+
+    assert summary['status'] == STATUS_INCOMPLETE
+    assert summary['failed'] == 1
+    assert summary['total_keys'] == 5
+
+
+def test_pacer_slows_down_once_per_failed_attempt(monkeypatch):
+    failures = []
+    original = AdaptivePacer.on_failure
+    monkeypatch.setattr(AdaptivePacer, "on_failure",
+                        lambda self, status_code=None: (failures.append(status_code), original(self, status_code)))
+    summary = run_flaky(monkeypatch, failures=4)
+
+    # Страница 1 - одна неудачная попытка, заказ 0-2 - четыре (две в проходе и две при повторе в конце)
+    assert summary['failed'] == 1
+    assert len(failures) == 5
+
+
+def test_resume_from_checkpoint(monkeypatch, tmp_path):
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    summary = run_flaky(monkeypatch, failures=4, checkpoint_file=checkpoint_file)
+    assert summary['status'] == STATUS_INCOMPLETE
+
+    checkpoint = AnalysisCheckpoint.load(checkpoint_file)
+    assert checkpoint.paging_done
+    assert len(checkpoint.keys) == 5 and len(checkpoint.records) == 5
+    assert [order['id'] for order in checkpoint.pending] == ["0-2"]
+
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=1, async_http=False)
+    engine = AnalysisEngine(FakeAccount(), settings, cache_file=None, checkpoint_file=checkpoint_file,
+                            key_index_file=None)
+    summary = engine.run(checkpoint.game_id, checkpoint.lot_name, checkpoint)
+
+    assert summary['status'] == STATUS_COMPLETED
+    assert summary['total_keys'] == 6
+    assert sorted(engine.order_records) == ["0-0", "0-2", "1-0", "1-2", "2-0", "2-2"]
+    assert not checkpoint.keys and not checkpoint.records
+    assert AnalysisCheckpoint.load(checkpoint_file) is None
+
+
+def test_settings_overrides_skip_none():
+    config = configparser.ConfigParser()
+    config.read_string("[Safety]\nworkers = 8\norder_limit = 100\n")
+
+    settings = AnalysisSettings.from_config(config, workers=None, order_limit=5)
+    assert settings.workers == 8
+    assert settings.order_limit == 5
@@ -0,0 +1,57 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+web = pytest.importorskip("aiohttp.web")
+
+from async_fetcher import AsyncFetchError, AsyncOrderFetcher, AsyncUnauthorizedError
+
+ORDER_HTML = (
+    "<div class='user-link-name'>seller</div>"
+    "<span class=\"text-success\">Закрыт</span>"
+    "<span class='secret-placeholder'>KEY123456</span>"
+)
+
+
+async def run_fetches():
+    async def order(request):
+        order_id = request.match_info['order_id']
+        assert "golden_key=GK" in request.headers["cookie"]
+        if order_id == "LOGIN":
+            return web.Response(text="<div>login</div>", content_type="text/html")
+        if order_id == "BUSY":
+            return web.Response(status=429, headers={"Retry-After": "3"})
+        return web.Response(text=ORDER_HTML, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/orders/{order_id}/", order)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    results = {}
+    try:
+        async with AsyncOrderFetcher("GK", "UA", base_url=f"http://127.0.0.1:{port}") as fetcher:
+            results['html'] = await fetcher.fetch_order_html("ABC123")
+            for order_id in ("LOGIN", "BUSY"):
+                try:
+                    await fetcher.fetch_order_html(order_id)
+                except AsyncFetchError as e:
+                    results[order_id] = e
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def test_async_fetcher_returns_order_html_and_errors():
+    results = asyncio.run(run_fetches())
+    assert results['html'] == ORDER_HTML
+    assert isinstance(results['LOGIN'], AsyncUnauthorizedError)
+    assert results['BUSY'].status_code == 429
+    assert results['BUSY'].response.headers.get("Retry-After") == "3"
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import STATUS_COMPLETED, AnalysisEngine, AnalysisSettings, create_account
+from cassette import CassetteRecorder, ReplayAccount, load_cassette, request_key
+from funpay_standin import FunPayStandIn
+
+
+def run(account, lot_name="Lot A", cassette=None, **settings):
+    settings = AnalysisSettings(**dict({'min_delay': 0, 'max_delay': 0, 'workers': 4, 'cache_enabled': False},
+                                       **settings))
+    engine = AnalysisEngine(account, settings, cache_file=None, checkpoint_file=None, cassette=cassette,
+                            key_index_file=None)
+    return engine.run(1, lot_name), engine
+
+
+def test_request_key_ignores_site_address():
+    assert request_key("GET", "https://funpay.com/orders/A1/") == request_key("get", "orders/A1/", {})
+    assert (request_key("post", "http://127.0.0.1:1/orders/trade", {"continue": "A1"}, "http://127.0.0.1:1")
+            == request_key("post", "orders/trade", {"continue": "A1"}))
+
+
+@pytest.mark.parametrize("async_http", [False, True])
+def test_record_and_replay(tmp_path, async_http):
+    path = tmp_path / "session.jsonl.gz"
+    standin = FunPayStandIn(orders=250, keys_per_order=2, match_rate=0.6, duplicate_rate=0.1, page_size=2000, seed=7)
+    with standin, CassetteRecorder(path) as recorder:
+        account = create_account("GK", base_url=standin.base_url)
+        recorded, recorded_engine = run(account, cassette=recorder, async_http=async_http)
+    assert recorded['status'] == STATUS_COMPLETED
+
+    # Главная страница, 3 страницы продаж и по ответу на каждый подходящий заказ
+    header, responses = load_cassette(path)
+    assert len(responses) == 1 + 3 + recorded['matched']
+
+    # Сервер уже остановлен: повтор идет только из кассеты, другим движком разбора
+    replayed, replayed_engine = run(ReplayAccount(path).get(), min_delay=5, max_delay=10, parser_backend="bs4")
+    assert replayed['status'] == STATUS_COMPLETED
+    assert (replayed['total_keys'], replayed['unique_keys']) == (recorded['total_keys'], recorded['unique_keys'])
+    assert replayed_engine.order_records == recorded_engine.order_records
+
+
+def test_replay_missing_order_fails_fast(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    with FunPayStandIn(orders=20, match_rate=0.5) as standin, CassetteRecorder(path) as recorder:
+        run(create_account("GK", base_url=standin.base_url), cassette=recorder)
+
+    # Заказы другого лота не записывались
+    summary, _ = run(ReplayAccount(path).get(), lot_name="Other lot", max_retries=5)
+    assert summary['failed'] == 10
+    assert summary['total_keys'] == 0
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from checkpoint import AnalysisCheckpoint
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    order = SimpleNamespace(id="ABC123", description="Game A", created_at="01.01.2024")
+    checkpoint = AnalysisCheckpoint(
+        game_id=1234,
+        lot_name="Game A",
+        start_from="XYZ",
+        page_num=3,
+        matched=2,
+        pending=[AnalysisCheckpoint.order_to_dict(order)],
+    )
+    record = {'order_id': "DEF456", 'date': "01.01.2024", 'keys': ["KEY123"]}
+    checkpoint.save(path, [AnalysisCheckpoint.journal_entry(
+        record, [{'key': "KEY123", 'order_id': "DEF456", 'date': "01.01.2024"}])])
+
+    loaded = AnalysisCheckpoint.load(path)
+    assert loaded.start_from == "XYZ"
+    assert loaded.page_num == 3
+    assert loaded.processed_ids == ["DEF456"]
+    assert loaded.keys[0]['key'] == "KEY123"
+    assert loaded.records == [record]
+    assert [o.id for o in loaded.pending_orders()] == ["ABC123"]
+
+    AnalysisCheckpoint.remove(path)
+    assert AnalysisCheckpoint.load(path) is None
+    assert not Path(AnalysisCheckpoint.journal_path(path)).exists()
+
+
+def test_checkpoint_journal_is_appended(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    pending = [{'id': order_id, 'description': "Game A", 'created_at': "01.01.2024"} for order_id in "ABC"]
+    checkpoint = AnalysisCheckpoint(1234, "Game A", pending=pending)
+
+    def entry(order_id):
+        record = {'order_id': order_id, 'date': "01.01.2024", 'keys': [f"KEY-{order_id}"]}
+        return AnalysisCheckpoint.journal_entry(record, [{'key': f"KEY-{order_id}", 'order_id': order_id,
+                                                          'date': "01.01.2024"}])
+
+    checkpoint.save(path, [entry("A")])
+    checkpoint.save(path)
+    # Заказ B записан дважды (повтор после ошибки), затем оборванная строка
+    checkpoint.save(path, [entry("B"), entry("B")])
+    with open(AnalysisCheckpoint.journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"record": {"order_id": "C"')
+
+    loaded = AnalysisCheckpoint.load(path)
+    assert loaded.processed_ids == ["A", "B"]
+    assert [key_data['key'] for key_data in loaded.keys] == ["KEY-A", "KEY-B"]
+    # Файл состояния не успел обновиться - обработанные заказы все равно не повторяются
+    assert [order['id'] for order in loaded.pending] == ["C"]
@@ -0,0 +1,54 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from checkpoint import AnalysisCheckpoint
+from cli_main import EXIT_INTERRUPTED, EXIT_OK
+from funpay_standin import FunPayStandIn
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+def cli_command(base_url, tmp_path, *extra):
+    return [sys.executable, str(REPO_DIR / "cli_main.py"), "--funpay-url", base_url,
+            "--config", str(tmp_path / "missing.ini"), "--checkpoint", str(tmp_path / "run.json"),
+            "-o", str(tmp_path / "keys.jsonl"), "--sync", "--workers", "2", "--no-cache", "--no-history",
+            "--min-delay", "0.01", "--max-delay", "0.01", *extra]
+
+
+def test_ctrl_c_saves_checkpoint_and_resumes(tmp_path):
+    standin = FunPayStandIn(orders=400, keys_per_order=2, latency=0.005, page_size=2000, seed=7)
+    env = dict(os.environ, FUNPAY_GOLDEN_KEY="GK")
+    with standin:
+        process = subprocess.Popen(cli_command(standin.base_url, tmp_path, "--game-id", "1", "--lot", "Lot A"),
+                                   cwd=tmp_path, env=env, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+        # Прерываем, когда часть заказов уже обработана
+        orders_seen = 0
+        for line in process.stderr:
+            orders_seen += "🔍 Заказ" in line
+            if orders_seen >= 20:
+                break
+        process.send_signal(signal.SIGINT)
+        process.communicate(timeout=60)
+        assert process.returncode == EXIT_INTERRUPTED
+
+        checkpoint = AnalysisCheckpoint.load(str(tmp_path / "run.json"))
+        assert checkpoint is not None
+        assert checkpoint.processed_ids
+
+        resumed = subprocess.run(cli_command(standin.base_url, tmp_path, "--resume"), cwd=tmp_path, env=env,
+                                 stderr=subprocess.DEVNULL, timeout=120)
+        assert resumed.returncode == EXIT_OK
+
+    # Вывод двух запусков - все ключи ровно один раз
+    with open(tmp_path / "keys.jsonl", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    total, _ = standin.expected_keys()
+    assert len(rows) == total
+    assert len({(row['order_id'], row['key']) for row in rows}) == len(rows)
+    assert not (tmp_path / "run.json").exists()
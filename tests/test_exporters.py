@@ -0,0 +1,79 @@
+import csv
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from exporters import ExportCancelled, detect_format, export_store
+from result_store import ResultStore
+
+
+def make_store():
+    store = ResultStore()
+    for order_id, keys in [("A", ["K1", "K2"]), ("B", ["K3", "K1"]), ("C", ["K1", "K2"])]:
+        for key in keys:
+            store.add(key, order_id, f"date {order_id}", lot_name="Lot")
+    return store
+
+
+def test_detect_format():
+    assert detect_format("keys.csv") == ("csv", None)
+    assert detect_format("keys.JSONL.gz") == ("jsonl", "gzip")
+    assert detect_format("keys.csv.zst") == ("csv", "zstd")
+    assert detect_format("keys.parquet") == ("parquet", None)
+    assert detect_format("keys") == ("txt", None)
+
+
+def test_export_csv_jsonl_txt(tmp_path):
+    store = make_store()
+    progress = []
+
+    path = str(tmp_path / "all.csv.gz")
+    assert export_store(store, path, chunk_rows=4, progress=lambda done, total: progress.append((done, total))) == 6
+    assert progress == [(4, 6), (6, 6)]
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["key", "order_id", "date", "lot_name", "occurrences"]
+    assert rows[1:3] == [["K1", "A", "date A", "Lot", "3"], ["K2", "A", "date A", "Lot", "2"]]
+    assert len(rows) == 7
+
+    path = str(tmp_path / "duplicates.jsonl")
+    assert export_store(store, path, kind="duplicates") == 5
+    lines = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines()]
+    assert [(row['key'], row['order_id']) for row in lines] == [("K1", "A"), ("K1", "B"), ("K1", "C"),
+                                                                 ("K2", "A"), ("K2", "C")]
+    assert lines[0]['occurrences'] == 3
+
+    path = str(tmp_path / "unique.txt")
+    assert export_store(store, path, kind="unique") == 3
+    assert Path(path).read_text(encoding="utf-8") == "K1\nK2\nK3\n"
+
+
+def test_export_cancel_removes_file(tmp_path):
+    store = make_store()
+    path = tmp_path / "all.csv"
+    with pytest.raises(ExportCancelled):
+        export_store(store, str(path), chunk_rows=2, should_stop=lambda: True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_parquet(tmp_path):
+    store = make_store()
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "all.parquet")
+    assert export_store(store, path, compression="zstd", chunk_rows=4) == 6
+    table = pq.read_table(path)
+    assert table.column("key").to_pylist() == ["K1", "K2", "K3", "K1", "K1", "K2"]
+    assert table.column("occurrences").to_pylist() == [3, 2, 1, 3, 3, 2]
+
+
+def test_export_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "unique.jsonl.zst"
+    assert export_store(make_store(), str(path), kind="unique") == 3
+    data = zstandard.ZstdDecompressor().stream_reader(path.read_bytes()).read().decode("utf-8")
+    assert [json.loads(line)['key'] for line in data.splitlines()] == ["K1", "K2", "K3"]
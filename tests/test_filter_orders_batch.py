@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import AnalysisEngine
+
+
+def test_filter_orders_batch_respects_limit():
+    batch = [
+        SimpleNamespace(id="1", description="Steam key Game A"),
+        SimpleNamespace(id="2", description="Game B"),
+        SimpleNamespace(id="3", description="Game A, region free"),
+        SimpleNamespace(id="4", description="Game A"),
+    ]
+    matched = AnalysisEngine.filter_orders_batch(batch, "Game A")
+    assert [o.id for o in matched] == ["1", "3", "4"]
+
+    limited = AnalysisEngine.filter_orders_batch(batch, "Game A", limit=2)
+    assert [o.id for o in limited] == ["1", "3"]
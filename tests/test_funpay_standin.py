@@ -0,0 +1,46 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import STATUS_COMPLETED, AnalysisEngine, AnalysisSettings, create_account
+from funpay_standin import FunPayStandIn, parse_latency
+
+
+def test_parse_latency():
+    rng = random.Random(1)
+    assert parse_latency(None)(rng) == 0
+    assert parse_latency("0.05")(rng) == 0.05
+    assert all(0.01 <= parse_latency("uniform:0.01:0.02")(rng) <= 0.02 for _ in range(100))
+    assert parse_latency("exp:0.01")(rng) >= 0
+    assert parse_latency("lognormal:0.01:0.5")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+
+def test_history_is_deterministic():
+    standin = FunPayStandIn(orders=100000, keys_per_order=3, duplicate_rate=0.2, seed=5)
+    assert standin.order_keys(99999) == FunPayStandIn(orders=100000, keys_per_order=3,
+                                                      duplicate_rate=0.2, seed=5).order_keys(99999)
+    total, unique = standin.expected_keys(order_limit=2000)
+    assert total <= 6000
+    assert unique < total
+
+
+@pytest.mark.parametrize("async_http", [False, True])
+def test_analysis_against_standin(async_http):
+    standin = FunPayStandIn(orders=250, keys_per_order=2, match_rate=0.5, duplicate_rate=0.1,
+                            latency="uniform:0:0.002", rate_429=0.05, rate_5xx=0.05, retry_after=0,
+                            page_size=2000, seed=3)
+    with standin:
+        account = create_account("GK", base_url=standin.base_url)
+        settings = AnalysisSettings(min_delay=0, max_delay=0, workers=4, max_retries=6,
+                                    async_http=async_http, cache_enabled=False)
+        summary = AnalysisEngine(account, settings, cache_file=None, checkpoint_file=None, key_index_file=None).run(1, "Lot A")
+
+    assert summary['status'] == STATUS_COMPLETED
+    assert (summary['total_keys'], summary['unique_keys']) == standin.expected_keys()
+    assert standin.stats['errors_429'] + standin.stats['errors_5xx'] > 0
@@ -0,0 +1,90 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import key_extractor
+from key_extractor import (available_backends, extract_keys_bs4, extract_keys_regex, get_extractor,
+                           resolve_backend)
+
+PAGES = [
+    # Обычная страница заказа с повтором ключа
+    "<div class='param-item'><h5>Товар</h5><div class='secret-list'>"
+    "<span class=\"secret-placeholder\">AAAAA-BBBBB-CCCCC</span>"
+    "<span class=\"secret-placeholder\"> DDDDD-EEEEE </span>"
+    "<span class=\"secret-placeholder\">AAAAA-BBBBB-CCCCC</span></div></div>",
+    # Несколько классов, одинарные кавычки и без кавычек, сущности
+    "<span class='copy secret-placeholder'>KEY&amp;123456</span>"
+    "<SPAN CLASS=secret-placeholder>KEY-&#65;BCDEF</SPAN>",
+    # Короткий текст и похожий класс не считаются
+    "<span class='secret-placeholder'>abc</span>"
+    "<span class='secret-placeholder-x'>NOT-A-KEY-1</span>"
+    "<span data-class='secret-placeholder'>NOT-A-KEY-2</span>"
+    "<span class='secret-placeholder'>REAL-KEY-1</span>",
+    # Вложенная разметка внутри span
+    "<span class='secret-placeholder'>KEY-<b>PART</b>-2</span>"
+    "<span class='secret-placeholder'>PLAIN-KEY-3</span>",
+    # Нет secret-placeholder - дополнительные селекторы
+    "<div class='secret'>x</div><code>CODE-KEY-1</code><pre>PRE-KEY-22</pre><code>CODE-KEY-1</code>",
+    # Теги и стили в другом регистре
+    "<PRE>UPPER-PRE-KEY</PRE><span style='font-family: monospace'>MONO-KEY-12</span>",
+    # Разметка в комментарии и в строке скрипта - не теги
+    "<!-- <span class=\"secret-placeholder\">COMMENT-KEY-1</span> -->"
+    "<script>var t = '<span class=\"secret-placeholder\">SCRIPT-KEY-1</span>';</script>"
+    "<span class=\"secret-placeholder\">REAL-KEY-2</span>",
+    "<script>document.write('<span class=\"secret-placeholder\">SCRIPT-KEY-2</span>')</script>",
+    # Текстовое поле и незакрытый комментарий
+    "<textarea><span class='secret-placeholder'>AREA-KEY-1</span></textarea>"
+    "<span class='secret-placeholder'>REAL-KEY-3</span>",
+    "<span class='secret-placeholder'>REAL-KEY-4</span><!-- <span class='secret-placeholder'>OPEN-KEY-1</span>",
+    # ">" в значении атрибута и span внутри значения атрибута
+    "<span class='secret-placeholder'>REAL-KEY-5</span>"
+    "<span title=\"a>b\" class=\"secret-placeholder\">ATTR-KEY-1</span>"
+    "<div data-tpl='<span class=\"secret-placeholder\">TPL-KEY-1</span>'>x</div>",
+    # Повторенный class (BeautifulSoup берет последний), <span .../> и теги внутри ключа
+    "<span class='secret-placeholder' class='x'>DUP-KEY-1</span>"
+    "<span class='x' class='secret-placeholder'>DUP-KEY-2</span>",
+    "<span class='secret-placeholder'/>SELF-KEY-1</span><span class='secret-placeholder'>REAL-KEY-6</span>",
+    "<span class='secret-placeholder'>STYLE-KEY<style>.a{}</style>-1</span>"
+    "<span class='secret-placeholder'>TITLE-<title>KEY</title>-2</span>",
+    # Ключей нет
+    "<html><body><div class='user-link-name'>buyer</div></body></html>",
+    "",
+]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("html", PAGES)
+def test_backends_match_bs4(backend, html):
+    assert get_extractor(backend)(html) == extract_keys_bs4(html)
+
+
+FRAGMENTS = [
+    "<span class='secret-placeholder'>", "<span class=secret-placeholder>",
+    "<span class='a' class='secret-placeholder'>",
+    "<span class='secret-placeholder'/>", "<span title=\"x>y\" class=\"secret-placeholder\">", "</span>",
+    "KEY-ABCDEF-1", "KEY-XYZ-22", "abc", "&amp;", " ", "<b>", "</b>", "<div title='a>b'>", "</div>", "<br>",
+    "<!--", "-->", "<script>", "</script>", "<style>", "</style>", "<title>", "</title>", "<textarea>", "</textarea>",
+    "<code>", "</code>", "<pre>", "</pre>", "<table>", "<td>", "<select>",
+]
+
+
+def test_regex_matches_bs4_on_random_markup():
+    # Сканер regex обязан совпадать с BeautifulSoup и на сломанной разметке
+    rng = random.Random(11)
+    for _ in range(2000):
+        html = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 14)))
+        assert extract_keys_regex(html) == extract_keys_bs4(html), html
+
+
+def test_resolve_backend():
+    assert resolve_backend("auto") == available_backends()[0]
+    assert resolve_backend(" BS4 ") == "bs4"
+    with pytest.raises(ValueError):
+        resolve_backend("unknown")
+    if not key_extractor.HAS_LXML:
+        with pytest.raises(ValueError):
+            resolve_backend("lxml")
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import AnalysisEngine, AnalysisSettings
+from key_index import KeyIndex
+
+
+def test_key_index_reports_earlier_orders(tmp_path):
+    index = KeyIndex(str(tmp_path / "keys.sqlite3"))
+    assert index.record_order("A1", ["KEY-1", "KEY-2"], 10, "Lot A", "01.01.2024") == {}
+    # Повторная обработка того же заказа - не повтор
+    assert index.record_order("A1", ["KEY-1"], 10, "Lot A", "01.01.2024") == {}
+
+    seen = index.record_order("B7", ["KEY-2", "KEY-3"], 20, "Lot B", "02.02.2024")
+    assert seen == {'KEY-2': {'order_id': "A1", 'game_id': 10, 'lot_name': "Lot A", 'date': "01.01.2024"}}
+    # Третья продажа - в ответе самая ранняя из других заказов
+    assert index.record_order("C9", ["KEY-2"], 30, "Lot C", "03.03.2024")["KEY-2"]['order_id'] == "A1"
+    assert index.record_order("B7", ["KEY-2"], 20, "Lot B", "02.02.2024")["KEY-2"]['order_id'] == "A1"
+    assert index.stats() == (5, 3)
+
+    index.clear()
+    assert index.stats() == (0, 0)
+    index.close()
+
+
+class ResoldKeysAccount:
+    """Два заказа нужного лота; ключи зависят только от номера заказа на странице"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def get_sells(self, start_from=None, **kwargs):
+        return None, [SimpleNamespace(id=f"{self.prefix}{i}", description="Lot", created_at="01.01.2024")
+                      for i in range(2)]
+
+    def method(self, request_method, api_method, headers, payload, **kwargs):
+        number = api_method.split("/")[1][-1]
+        html = (f'<div class="user-link-name">seller</div><span class="text-success">Закрыт</span>'
+                f'<span class="secret-placeholder">RESOLD-KEY-{number}</span>')
+        return SimpleNamespace(status_code=200, content=html.encode())
+
+
+def test_engine_flags_keys_from_previous_runs(tmp_path):
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=1, async_http=False)
+    index_file = str(tmp_path / "keys.sqlite3")
+
+    def run(prefix, game_id):
+        engine = AnalysisEngine(ResoldKeysAccount(prefix), settings, cache_file=None, checkpoint_file=None,
+                                key_index_file=index_file)
+        return engine.run(game_id, "Lot"), engine.all_sold_keys
+
+    first, first_keys = run("A", 1)
+    assert first['seen_before'] == 0
+    assert all(key_data['seen_before'] is None for key_data in first_keys)
+
+    second, second_keys = run("B", 2)
+    assert second['seen_before'] == 2
+    assert second['duplicates'] == 0  # В пределах запуска повторов нет
+    earlier = {key_data['key']: key_data['seen_before'] for key_data in second_keys}
+    assert earlier["RESOLD-KEY-0"] == {'order_id': "A0", 'game_id': 1, 'lot_name': "Lot", 'date': "01.01.2024"}
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from log_sink import LogBuffer, RotatingLogWriter
+
+
+class FakeText:
+    """Текстовое поле: строки, как в Tk Text после flush"""
+
+    def __init__(self):
+        self.lines = []
+
+    def apply(self, update):
+        excess, text = update
+        if excess is None:
+            self.lines = []
+        else:
+            del self.lines[:excess]
+        self.lines.extend(text.splitlines(keepends=True))
+
+
+def test_buffer_keeps_last_lines():
+    buffer = LogBuffer(max_lines=5)
+    text = FakeText()
+    assert buffer.flush() is None
+
+    for i in range(3):
+        buffer.append(f"line {i}\n")
+    text.apply(buffer.flush())
+    assert text.lines == ["line 0\n", "line 1\n", "line 2\n"]
+
+    # Пачка, которая вытесняет старые строки: удаляются только лишние сверху
+    for i in range(3, 7):
+        buffer.append(f"line {i}\n")
+    update = buffer.flush()
+    assert update[0] == 2
+    text.apply(update)
+    assert text.lines == [f"line {i}\n" for i in range(2, 7)]
+
+    # Пачка больше окна - поле заполняется заново последними строками
+    for i in range(7, 20):
+        buffer.append(f"line {i}\n")
+    update = buffer.flush()
+    assert update[0] is None
+    text.apply(update)
+    assert text.lines == [f"line {i}\n" for i in range(15, 20)]
+    assert len(buffer.lines) == 5
+
+    buffer.clear()
+    assert buffer.flush() is None and not buffer.lines
+
+
+def test_buffer_counts_lines_of_multiline_messages():
+    buffer = LogBuffer(max_lines=5)
+    text = FakeText()
+    buffer.append("first\n")
+    buffer.append("second\n")
+    text.apply(buffer.flush())
+
+    # Сообщение из трех строк вытесняет только одну старую - в поле не больше max_lines строк
+    buffer.append("error:\n  line 1\n  line 2\n")
+    buffer.append("last")
+    update = buffer.flush()
+    assert update[0] == 1
+    text.apply(update)
+    assert text.lines == ["second\n", "error:\n", "  line 1\n", "  line 2\n", "last\n"]
+    assert list(buffer.lines) == text.lines
+
+
+def test_writer_rotates_files(tmp_path):
+    path = tmp_path / "analysis.log"
+    writer = RotatingLogWriter(str(path), max_mb=0.001, backups=2)
+    for i in range(100):
+        writer.write(f"сообщение {i:03d} " + "x" * 40, created=1700000000.5)
+    writer.close()
+
+    assert path.exists()
+    assert (tmp_path / "analysis.log.1").exists()
+    assert (tmp_path / "analysis.log.2").exists()
+    assert not (tmp_path / "analysis.log.3").exists()
+    # Последние сообщения - в текущем файле, в порядке записи
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[-1].endswith("сообщение 099 " + "x" * 40)
+    assert lines[-1].startswith("[2023-11-")
@@ -0,0 +1,57 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lot_matcher import LotMatcher, split_lots
+
+
+def test_split_lots():
+    assert split_lots("Lot A; Lot B;;Lot A\nLot C ") == ["Lot A", "Lot B", "Lot C"]
+    assert split_lots("") == []
+
+
+def test_automaton_matches_like_substring_search():
+    rng = random.Random(3)
+    alphabet = "abcAB "
+    for _ in range(500):
+        lots = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(2, 6))]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        automaton = LotMatcher(lots, min_automaton_lots=2)
+        assert automaton.matches(text) == [lot for lot in automaton.lots if lot in text]
+        assert automaton.matches(text) == LotMatcher(lots).matches(text)
+
+
+def test_most_specific_lot_wins():
+    for matcher in (LotMatcher(["Lot A", "Lot A Deluxe", "Lot B"]),
+                    LotMatcher(["Lot A", "Lot A Deluxe", "Lot B"], min_automaton_lots=2)):
+        assert matcher.match("Steam key, Lot A Deluxe edition") == "Lot A Deluxe"
+        assert matcher.match("Steam key, Lot A edition") == "Lot A"
+        assert matcher.match("Lot B + Lot A") == "Lot A"
+        assert matcher.match("lot b") is None
+        assert matcher.match("") is None
+
+
+def test_engine_matches_all_lots_in_one_pass():
+    from analysis_engine import STATUS_COMPLETED, AnalysisEngine, AnalysisSettings, create_account
+    from funpay_standin import FunPayStandIn
+
+    def run(lot_name):
+        standin = FunPayStandIn(orders=450, match_rate=0.5, lot_name=["Lot A", "Lot B", "Lot C"], page_size=2000)
+        with standin:
+            settings = AnalysisSettings(min_delay=0, max_delay=0, workers=4, cache_enabled=False, async_http=False)
+            engine = AnalysisEngine(create_account("GK", base_url=standin.base_url), settings, cache_file=None,
+                                    checkpoint_file=None, key_index_file=None)
+            return engine.run(1, lot_name), engine, standin.stats
+
+    summary, engine, stats = run(["Lot A", "Lot B", "Lot C"])
+    assert summary['status'] == STATUS_COMPLETED
+    assert summary['matched'] == 225 and summary['total_keys'] == 225
+    assert summary['lots'] == {lot: {'orders': 75, 'keys': 75} for lot in ("Lot A", "Lot B", "Lot C")}
+    assert {key_data['lot_name'] for key_data in engine.all_sold_keys} == {"Lot A", "Lot B", "Lot C"}
+
+    # Три лота - те же страницы истории продаж, что и один
+    single_summary, _, single_stats = run("Lot B")
+    assert single_summary['matched'] == 75
+    assert stats['sells'] == single_stats['sells']
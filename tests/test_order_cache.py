@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from order_cache import OrderCache
+
+
+def test_order_cache_roundtrip_and_clear(tmp_path):
+    cache = OrderCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get("ABC123") is None
+
+    cache.put("ABC123", "<span class='secret-placeholder'>KEY123</span>")
+    assert cache.get("ABC123") == "<span class='secret-placeholder'>KEY123</span>"
+    assert cache.stats()[0] == 1
+
+    cache.invalidate("ABC123")
+    assert cache.get("ABC123") is None
+
+    cache.put("DEF456", "html")
+    cache.clear()
+    assert cache.stats() == (0, 0)
+    cache.close()
+
+
+def test_order_cache_evicts_least_recently_used(tmp_path):
+    cache = OrderCache(str(tmp_path / "cache.sqlite3"), max_size_mb=0.01)
+    for i in range(20):
+        cache.put(f"order{i}", os.urandom(1000).hex())
+    count, size = cache.stats()
+    assert size <= cache.max_bytes
+    assert count < 20
+    assert cache.get("order19") is not None
+    assert cache.get("order0") is None
+    cache.close()
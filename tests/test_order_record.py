@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from order_record import STATUS_CLOSED, STATUS_PAID, STATUS_REFUNDED, parse_order_page
+
+ORDER_PAGE = """
+<html><body>
+<ul class="nav navbar-nav navbar-right logged"><li class="active"><a href="/orders/trade">Продажи</a></li></ul>
+<div class="user-link-name">seller</div>
+<h1 class="page-header">Заказ #ABC123 <span class="text-success">Закрыт</span></h1>
+<div class="row">
+  <div class="param-item"><h5>Игра</h5><div><a href="https://funpay.com/lots/1000/">Some Game</a></div></div>
+  <div class="param-item"><h5>Категория</h5><div><a href="https://funpay.com/lots/1000/">Ключи</a></div></div>
+  <div class="param-item"><h5>Краткое описание</h5><div>Some Game Steam key, region free</div></div>
+  <div class="param-item"><h5>Подробное описание</h5><div>Ключ активации.
+      <div class="note">Активировать в Steam</div></div></div>
+  <div class="param-item"><h5>Количество</h5><div>2 шт.</div></div>
+  <div class="param-item"><h5>Сумма</h5><div><span>1 250.50</span> <span class="unit">₽</span></div></div>
+  <div class="param-item"><h5>Сервер</h5><div>EU</div></div>
+  <div class="param-item"><h5>Оплаченный товар</h5><ul class="order-secrets-list">
+      <li><span class="secret-placeholder">AAAAA-BBBBB-CCCCC</span></li>
+      <li><span class="secret-placeholder">DDDDD-EEEEE-FFFFF</span></li></ul></div>
+</div>
+<div class="chat-header"><div class="media-user-name"><a href="https://funpay.com/users/777/">buyer&amp;co</a></div></div>
+</body></html>
+"""
+
+
+def test_parse_order_page():
+    record = parse_order_page(ORDER_PAGE, "ABC123", "01.01.2024")
+    assert record['order_id'] == "ABC123"
+    assert record['status'] == STATUS_CLOSED
+    assert record['keys'] == ["AAAAA-BBBBB-CCCCC", "DDDDD-EEEEE-FFFFF"]
+    assert record['buyer'] == "buyer&co"
+    assert record['buyer_id'] == 777
+    assert record['game'] == "Some Game"
+    assert record['category'] == "Ключи"
+    assert record['short_description'] == "Some Game Steam key, region free"
+    assert record['full_description'] == "Ключ активации. Активировать в Steam"
+    assert record['amount'] == 2
+    assert record['price'] == 1250.5
+    assert record['secret_sections'] == [{'title': "Оплаченный товар", 'keys': 2}]
+    assert record['params'] == {"Сервер": "EU"}
+
+
+def test_parse_order_page_without_metadata():
+    record = parse_order_page("<span class='secret-placeholder'>KEY123456</span>")
+    assert record['keys'] == ["KEY123456"]
+    assert record['status'] == STATUS_PAID
+    assert record['buyer'] is None
+    assert record['price'] is None
+
+
+def test_secret_sections_and_refund_status():
+    html = ('<h1>Заказ <span class="text-success">Закрыт</span> <span class="text-warning">Возврат</span></h1>'
+            '<div class="param-item"><h5>Товар 1</h5><ul>'
+            '<li><span class="secret-placeholder">KEY&amp;AAAAA</span></li>'
+            '<li><span class="secret-placeholder">KEY&amp;AAAAA</span></li>'
+            '<li><span class="secret-placeholder">abc</span></li></ul></div>'
+            '<div class="param-item"><h5>Товар 2</h5>'
+            '<div><span class="secret-placeholder"> KEY-BBBBB </span></div></div>')
+    record = parse_order_page(html)
+    assert record['status'] == STATUS_REFUNDED
+    assert record['keys'] == ["KEY&AAAAA", "KEY-BBBBB"]
+    # Повтор и короткий текст внутри раздела не считаются
+    assert record['secret_sections'] == [{'title': "Товар 1", 'keys': 1}, {'title': "Товар 2", 'keys': 1}]
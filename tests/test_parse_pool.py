@@ -0,0 +1,56 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analysis_engine import STATUS_COMPLETED, AnalysisEngine, AnalysisSettings
+from order_record import parse_order_page
+from parse_pool import ParsePool
+
+
+def make_page(i):
+    return ('<div class="user-link-name">buyer</div><span class="text-success">Закрыт</span>'
+            + "".join(f"<span class='secret-placeholder'>KEY-{i}-{j:04d}</span>" for j in range(i % 3 + 1)))
+
+
+def test_parse_pool_matches_in_process_parsing():
+    pages = [make_page(i) for i in range(6)]
+    with ParsePool("bs4", processes=2) as pool:
+        for i, page in enumerate(pages):
+            assert pool.parse(page, str(i), "01.01.2024") == parse_order_page(page, str(i), "01.01.2024", "bs4")
+
+        async def parse_all():
+            return await asyncio.gather(*(pool.parse_async(page, str(i)) for i, page in enumerate(pages)))
+
+        assert asyncio.run(parse_all()) == [parse_order_page(page, str(i), None, "bs4")
+                                            for i, page in enumerate(pages)]
+
+
+class PagesAccount:
+    """Одна страница из 6 заказов со страницами make_page"""
+
+    def get_sells(self, start_from=None, game=None, **kwargs):
+        return None, [SimpleNamespace(id=str(i), description="Game A", created_at="01.01.2024") for i in range(6)]
+
+    def method(self, request_method, api_method, headers, payload, **kwargs):
+        return SimpleNamespace(status_code=200, content=make_page(int(api_method.split("/")[1])).encode())
+
+
+def run_engine(process_pool):
+    settings = AnalysisSettings(min_delay=0, max_delay=0, workers=2, async_http=False,
+                                process_pool=process_pool)
+    engine = AnalysisEngine(PagesAccount(), settings, cache_file=None, checkpoint_file=None, key_index_file=None)
+    summary = engine.run(1, "Game A")
+    return summary, engine.order_records, sorted(tuple(key_data.to_dict().items()) for key_data in engine.all_sold_keys)
+
+
+def test_engine_with_process_pool_matches_in_process_run():
+    summary, records, keys = run_engine(process_pool=True)
+    expected_summary, expected_records, expected_keys = run_engine(process_pool=False)
+
+    assert summary['status'] == STATUS_COMPLETED and summary['total_keys'] == 12
+    assert summary == expected_summary
+    assert records == expected_records
+    assert keys == expected_keys
@@ -0,0 +1,40 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rate_limiter import AdaptivePacer, TokenBucket
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve() == 0.0
+    assert abs(bucket.reserve() - 0.1) < 0.02
+    assert abs(bucket.reserve() - 0.2) < 0.02
+
+
+def test_token_bucket_acquire_cancelled():
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    bucket.reserve()
+    started = time.monotonic()
+    assert bucket.acquire(lambda: True) is False
+    assert time.monotonic() - started < 0.5
+
+
+def test_adaptive_pacer_aimd_within_bounds():
+    pacer = AdaptivePacer(min_interval=1, max_interval=5, increase_steps=4)
+    assert abs(pacer.interval - 3) < 1e-9
+
+    for _ in range(10):
+        pacer.on_success()
+    assert pacer.rate == pacer.max_rate == 1.0
+
+    pacer.on_failure(status_code=429)
+    assert pacer.rate == 0.5
+    pacer.on_failure()
+    assert pacer.rate == 0.375
+
+    for _ in range(10):
+        pacer.on_failure(status_code=429)
+    assert pacer.rate == pacer.min_rate == 0.2
@@ -0,0 +1,91 @@
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from result_store import ResultStore
+
+
+def test_store_behaves_like_list_of_dicts():
+    sale = {'order_id': "A1", 'game_id': 1, 'lot_name': "Lot", 'date': "01.01.2024"}
+    rows = [
+        {'key': "KEY-1", 'order_id': "B1", 'date': "02.01.2024", 'seen_before': None},
+        {'key': "KEY-2", 'order_id': "B1", 'date': "02.01.2024", 'seen_before': sale},
+        {'key': "KEY-1", 'order_id': "B2", 'date': "03.01.2024", 'seen_before': None},
+    ]
+    store = ResultStore(rows)
+
+    assert len(store) == 3
+    assert store[1]['key'] == "KEY-2"
+    assert store[-1].order_id == "B2"
+    assert store[1].get('seen_before') == sale
+    assert store[0].get('missing', "default") == "default"
+    assert dict(store[2]) == rows[2]
+    assert list(store) == rows
+    assert [key_data.to_dict() for key_data in store] == rows
+    assert store.stats.seen_before == 1
+
+    store.clear()
+    assert len(store) == 0 and not store
+    assert store.stats.as_dict() == {'total_keys': 0, 'unique_keys': 0, 'duplicates': 0, 'seen_before': 0}
+
+
+def test_stats_follow_added_keys():
+    store = ResultStore()
+    for order_id, keys in [("A", ["K1", "K2"]), ("B", ["K3", "K1"]), ("C", ["K1", "K2"]), ("D", ["K4"])]:
+        for key in keys:
+            store.add(key, order_id, "01.01.2024")
+
+    stats = store.stats
+    assert (stats.total, stats.unique, stats.duplicates) == (7, 4, 3)
+    assert [row[0] for row in store.export_rows("unique")] == ["K1", "K2", "K3", "K4"]
+    assert [row[:2] for row in store.export_rows("duplicates")] == [("K1", "A"), ("K1", "B"), ("K1", "C"),
+                                                                    ("K2", "A"), ("K2", "C")]
+    assert stats.occurrences("K1") == 3
+    assert stats.occurrences("K4") == 1
+    assert stats.occurrences("missing") == 0
+    assert [(group.key, group.order_ids) for group in store.duplicate_report()] == [("K1", ["A", "B", "C"]),
+                                                                                   ("K2", ["A", "C"])]
+
+
+def test_store_is_smaller_than_dicts():
+    keys = [f"KEY-{i:08d}-ABCDE" for i in range(20000)]
+    order_ids = [f"O{i}" for i in range(10000)]
+
+    def allocated(build):
+        tracemalloc.start()
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size, result
+
+    def build_store():
+        store = ResultStore()
+        for i, key in enumerate(keys):
+            store.add(key, order_ids[i // 2], "01.01.2024")
+        return store
+
+    dict_size, _ = allocated(lambda: [{'key': key, 'order_id': order_ids[i // 2], 'date': "01.01.2024",
+                                       'seen_before': None} for i, key in enumerate(keys)])
+    store_size, _ = allocated(build_store)
+    # Строки ключей общие, сравниваются только служебные данные на ключ
+    assert store_size < dict_size / 2
+
+
+def test_duplicate_report_orders_by_severity():
+    store = ResultStore()
+    for order_id, keys in [("A", ["K1", "K2", "K2"]), ("B", ["K3", "K1"]), ("C", ["K3", "K4"]), ("D", ["K3"])]:
+        for key in keys:
+            store.add(key, order_id, f"date {order_id}", lot_name="Lot")
+
+    report = store.duplicate_report()
+    # K3 - три покупателя, K1 - два, K2 повторен внутри одного заказа
+    assert [(group.key, group.orders, group.count) for group in report] == [("K3", 3, 3), ("K1", 2, 2),
+                                                                            ("K2", 1, 2)]
+    assert report[0].order_ids == ["B", "C", "D"]
+    assert report[0].dates == ["date B", "date C", "date D"]
+    assert report[1].lot_names == ["Lot", "Lot"]
+    assert list(store.export_rows("report"))[:3] == [("K3", "B", "date B", "Lot", 3), ("K3", "C", "date C", "Lot", 3),
+                                                     ("K3", "D", "date D", "Lot", 3)]
+    assert store.export_count("report") == 7
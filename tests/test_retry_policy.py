@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from retry_policy import RetryPolicy, retry_after_seconds
+
+
+class FlakyError(Exception):
+    pass
+
+
+class FatalError(FlakyError):
+    pass
+
+
+def test_retry_policy_retries_then_succeeds():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, retry_on=(FlakyError,))
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FlakyError()
+        return "ok"
+
+    assert policy.call(func) == "ok"
+    assert len(calls) == 3
+
+
+def test_retry_policy_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.001, retry_on=(FlakyError,), no_retry_on=(FatalError,))
+    retries = []
+
+    def func():
+        raise FlakyError()
+
+    with pytest.raises(FlakyError):
+        policy.call(func, on_retry=lambda e, attempt, delay: retries.append(attempt))
+    assert retries == [1]
+
+    def fatal():
+        raise FatalError()
+
+    with pytest.raises(FatalError):
+        policy.call(fatal, on_retry=lambda e, attempt, delay: retries.append(attempt))
+    assert retries == [1]
+
+
+def test_backoff_respects_retry_after_and_cap():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    for attempt in range(1, 8):
+        assert 0 <= policy.backoff(attempt) <= 10
+    assert policy.backoff(1, retry_after=7) >= 7
+    assert policy.backoff(1, retry_after=600) == 10
+
+    error = SimpleNamespace(response=SimpleNamespace(headers={'Retry-After': '5'}))
+    assert retry_after_seconds(error) == 5.0
+    assert retry_after_seconds(Exception()) is None
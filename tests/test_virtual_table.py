@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from virtual_table import RowWindow
+
+
+def test_row_window_scrolling():
+    window = RowWindow(visible=10)
+    assert list(window.rows()) == []
+    assert window.fractions() == (0.0, 1.0)
+
+    window.resize(total=1000000)
+    assert list(window.rows()) == list(range(10))
+
+    window.scroll(3)
+    window.scroll(2, "pages")
+    assert window.offset == 23
+
+    window.moveto(0.5)
+    assert list(window.rows()) == list(range(500000, 500010))
+    assert window.fractions() == (0.5, 0.50001)
+
+    # Прокрутка не выходит за границы данных
+    window.moveto(1)
+    assert window.offset == 999990 and window.at_end()
+    window.scroll(5, "pages")
+    assert window.offset == 999990
+    window.scroll(-2000000)
+    assert window.offset == 0
+
+
+def test_row_window_shrinks_with_data():
+    window = RowWindow(visible=10)
+    window.resize(total=100)
+    window.moveto(1)
+    window.resize(total=4)
+    assert window.offset == 0
+    assert list(window.rows()) == [0, 1, 2, 3]
+    window.resize(visible=2)
+    window.moveto(1)
+    assert list(window.rows()) == [2, 3]
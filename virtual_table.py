@@ -0,0 +1,146 @@
+"""
+Виртуальная таблица результатов: Treeview держит только видимые строки,
+остальные берутся из хранилища при прокрутке
+"""
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class RowWindow:
+    """Окно видимых строк над источником из total строк (без Tk - логика прокрутки)"""
+
+    def __init__(self, visible=15):
+        self.total = 0
+        self.visible = max(1, visible)
+        self.offset = 0
+
+    def clamp(self):
+        self.offset = max(0, min(self.offset, self.total - self.visible))
+        return self.offset
+
+    def resize(self, total=None, visible=None):
+        if total is not None:
+            self.total = total
+        if visible is not None:
+            self.visible = max(1, visible)
+        return self.clamp()
+
+    def moveto(self, fraction):
+        """Позиция ползунка прокрутки (0..1)"""
+        self.offset = int(round(float(fraction) * self.total))
+        return self.clamp()
+
+    def scroll(self, count, what="units"):
+        """Прокрутка на count строк или страниц"""
+        step = self.visible if what == "pages" else 1
+        self.offset += int(count) * step
+        return self.clamp()
+
+    def at_end(self):
+        return self.offset + self.visible >= self.total
+
+    def rows(self):
+        """Индексы видимых строк"""
+        return range(self.offset, min(self.offset + self.visible, self.total))
+
+    def fractions(self):
+        """(первая, последняя) доли для Scrollbar.set"""
+        if not self.total:
+            return 0.0, 1.0
+        return self.offset / self.total, min(self.offset + self.visible, self.total) / self.total
+
+
+class VirtualTreeview:
+    """ttk.Treeview с собственным Scrollbar: создает не больше строк, чем помещается на экране.
+
+    row_count() - число строк источника, row_values(index) - (values, tags) строки index.
+    Открытие и прокрутка стоят одинаково для 100 и для миллиона строк"""
+
+    def __init__(self, parent, columns, row_count, row_values, height=15):
+        self.row_count = row_count
+        self.row_values = row_values
+        self.window = RowWindow(height)
+        self.follow_tail = True  # Новые строки прокручивают таблицу, пока пользователь внизу
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=height)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.on_scrollbar)
+        self._items = []
+
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Configure>", self.on_configure)
+        for key, count, what in (("<Prior>", -1, "pages"), ("<Next>", 1, "pages"),
+                                 ("<Up>", -1, "units"), ("<Down>", 1, "units")):
+            self.tree.bind(key, lambda event, count=count, what=what: self.scroll(count, what) or "break")
+        self.tree.bind("<Home>", lambda event: self.moveto(0) or "break")
+        self.tree.bind("<End>", lambda event: self.moveto(1) or "break")
+
+    def pack(self):
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def pack_forget(self):
+        self.tree.pack_forget()
+        self.scrollbar.pack_forget()
+
+    def heading(self, column, **kwargs):
+        self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        self.tree.column(column, **kwargs)
+
+    def tag_configure(self, tag, **kwargs):
+        self.tree.tag_configure(tag, **kwargs)
+
+    def refresh(self):
+        """Перечитывание видимых строк из источника (после добавления или очистки данных)"""
+        window = self.window
+        window.resize(total=self.row_count())
+        if self.follow_tail:
+            window.moveto(1)
+        rows = window.rows()
+        # Строки Treeview переиспользуются: меняются только их значения
+        while len(self._items) < len(rows):
+            self._items.append(self.tree.insert("", "end", values=()))
+        while len(self._items) > len(rows):
+            self.tree.delete(self._items.pop())
+        for item, index in zip(self._items, rows):
+            values, tags = self.row_values(index)
+            self.tree.item(item, values=values, tags=tags)
+        self.scrollbar.set(*window.fractions())
+
+    def scroll(self, count, what="units"):
+        self.window.scroll(count, what)
+        self.follow_tail = self.window.at_end()
+        self.refresh()
+
+    def moveto(self, fraction):
+        self.window.moveto(fraction)
+        self.follow_tail = self.window.at_end()
+        self.refresh()
+
+    def on_scrollbar(self, action, value, what=None):
+        if action == "moveto":
+            self.moveto(value)
+        elif action == "scroll":
+            self.scroll(value, what)
+
+    def on_mousewheel(self, event):
+        # Windows: шаг 120 на щелчок колеса, macOS: единицы
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-delta * 3)
+        return "break"
+
+    def on_configure(self, event):
+        # Число видимых строк - по высоте виджета за вычетом заголовка
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        try:
+            row_height = int(row_height)
+        except (TypeError, ValueError, tk.TclError):
+            row_height = DEFAULT_ROW_HEIGHT
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.window.visible:
+            self.window.resize(visible=visible)
+            self.refresh()